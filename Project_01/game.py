@@ -274,12 +274,141 @@ class Grid:
                 bools.append(False)
         return bools
 
+    def toBitGrid(self):
+        return BitGrid.fromGrid(self)
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation= bitRep[2:])
 
+class BitGrid:
+    """
+    A boolean Grid backed by a single Python int.  Cell (x,y) is bit
+    x * height + y, the same cell order used by Grid.__hash__ and packBits, so
+    a BitGrid hashes and compares equal to a Grid with the same contents.
+
+    Data is still accessed via grid[x][y].  Since ints are immutable, copy()
+    just shares the int and a write rebinds it, which makes copies O(1) and
+    copy-on-write.  count() is a popcount and __hash__ hashes the int.
+    """
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        if initialValue:
+            bits = (1 << (width * height)) - 1
+        self.bits = bits
+
+    def fromGrid(grid):
+        """
+        Builds a BitGrid with the same contents as a (list backed) Grid.
+        """
+        bits = 0
+        base = 1
+        for column in grid.data:
+            for cell in column:
+                if cell:
+                    bits |= base
+                base <<= 1
+        return BitGrid(grid.width, grid.height, bits=bits)
+    fromGrid = staticmethod(fromGrid)
+
+    def toGrid(self):
+        g = Grid(self.width, self.height)
+        g.data = self.data
+        return g
+
+    def __getitem__(self, x):
+        if x < 0: x += self.width
+        if x < 0 or x >= self.width: raise IndexError('BitGrid column out of range')
+        return _BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y in range(self.height):
+            _BitGridColumn(self, x)[y] = column[y]
+
+    def __len__(self):
+        return self.width
+
+    def _get_data(self):
+        """
+        A list of lists copy of the cells, for code that reads Grid.data.
+        Writes to it are not reflected in the BitGrid.
+        """
+        h = self.height
+        cells = self._cells(self.bits)
+        return [[c == '1' for c in cells[x * h:(x + 1) * h]] for x in range(self.width)]
+    data = property(_get_data)
+
+    def _cells(self, bits):
+        # One '0'/'1' character per cell, cell 0 first
+        return bin(bits)[2:].zfill(self.width * self.height)[::-1]
+
+    def __str__(self):
+        return str(self.toGrid())
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return self.data == other.data
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        return BitGrid(self.width, self.height, bits=self.bits)
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        # The bits are immutable, so a shallow copy is already a full copy
+        return self.copy()
+
+    def count(self, item =True ):
+        full = bin(self.bits).count('1')
+        if item: return full
+        return self.width * self.height - full
+
+    def asList(self, key = True):
+        h = self.height
+        want = '1' if key else '0'
+        return [(i // h, i % h) for i, c in enumerate(self._cells(self.bits)) if c == want]
+
+    def packBits(self):
+        return self.toGrid().packBits()
+
+class _BitGridColumn:
+    """
+    A view of one column of a BitGrid, so that grid[x][y] reads and writes
+    the underlying bits.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __getitem__(self, y):
+        if y < 0: y += self.grid.height
+        if y < 0 or y >= self.grid.height: raise IndexError('BitGrid row out of range')
+        return (self.grid.bits >> (self.offset + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if y < 0: y += self.grid.height
+        if y < 0 or y >= self.grid.height: raise IndexError('BitGrid row out of range')
+        mask = 1 << (self.offset + y)
+        if value:
+            self.grid.bits |= mask
+        else:
+            self.grid.bits &= ~mask
+
+    def __len__(self):
+        return self.grid.height
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -488,7 +617,7 @@ class GameStateData:
         """
         Creates an initial game state from a layout array (see layout.py).
         """
-        self.food = layout.food.copy()
+        self.food = layout.food.toBitGrid()
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -46,7 +46,7 @@ from game import Actions
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
-import sys, types, time, random, os
+import sys, types, time, random, os, contextlib
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -71,14 +71,36 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of which states have been generated.  It is
+    # None unless explored-state tracking is on (see trackExplored), so normal
+    # games neither pay for hashing every successor nor grow an unbounded set.
+    # Any counter with add, copy and clear can stand in for the default set.
+    explored = None
     def getAndResetExplored():
+        if GameState.explored is None: return set()
         tmp = GameState.explored.copy()
-        GameState.explored = set()
+        GameState.explored.clear()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def trackExplored( counter=None ):
+        """
+        Records generated states in counter (a new set by default) for the
+        duration of a with block, restoring the previous setting afterwards:
+
+          with GameState.trackExplored() as explored:
+              agent.getAction(state)
+          print(len(explored))
+        """
+        previous = GameState.explored
+        if counter is None: counter = set()
+        GameState.explored = counter
+        try:
+            yield counter
+        finally:
+            GameState.explored = previous
+    trackExplored = staticmethod(contextlib.contextmanager(trackExplored))
+
     def getLegalActions( self, agentIndex=0 ):
         """
         Returns the legal actions for the agent specified.
@@ -120,8 +142,9 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.explored is not None:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions( self ):
@@ -268,8 +291,18 @@ class ClassicGameRules:
     These game rules manage the control flow of a game, deciding when
     and how the game starts and ends.
     """
-    def __init__(self, timeout=30):
+    def __init__(self, timeout=30, trackExplored=False):
         self.timeout = timeout
+        self.trackExplored = trackExplored
+
+    def exploredTracking( self ):
+        """
+        Context to run a game in: records explored states in a fresh
+        GameState.explored if this rule set tracks them, otherwise does nothing.
+        """
+        if self.trackExplored:
+            return GameState.trackExplored()
+        return contextlib.nullcontext()
 
     def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
@@ -625,11 +658,11 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, trackExplored=False ):
     import __main__
     __main__.__dict__['_display'] = display
 
-    rules = ClassicGameRules(timeout)
+    rules = ClassicGameRules(timeout, trackExplored)
     games = []
 
     for i in range( numGames ):
@@ -643,7 +676,8 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
             gameDisplay = display
             rules.quiet = False
         game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
-        game.run()
+        with rules.exploredTracking():
+            game.run()
         if not beQuiet: games.append(game)
 
         if record:
@@ -18,6 +18,9 @@ Pacman agents (in searchAgents.py).
 """
 
 import util
+import heapq
+import itertools
+from array import array
 
 
 class SearchProblem:
@@ -74,6 +77,141 @@ def tinyMazeSearch(problem):
     return [s, s, w, s, w, w, s, w]
 
 
+class SearchNodes:
+    """
+    The nodes generated by a search, stored compactly: node i is the i-th
+    entry of a list of states, an array of parent node ids and an array of
+    action codes, rather than a tuple holding its whole chain of ancestors.
+    The start node is node 0, with parent -1.
+    """
+
+    __slots__ = ('states', 'parents', 'codes', 'actions', 'actionCodes')
+
+    def __init__(self, start):
+        self.states = [start]
+        self.parents = array('l', [-1])
+        self.codes = array('H', [0])
+        # actions[code] is the action with that code, and actionCodes the
+        # reverse; code 0 is the start node's None
+        self.actions = [None]
+        self.actionCodes = {None: 0}
+
+    def add(self, state, parent, action):
+        "Stores a new node and returns its id"
+        self.states.append(state)
+        self.parents.append(parent)
+        self.codes.append(self.actionCode(action))
+        return len(self.states) - 1
+
+    def setParent(self, node, parent, action):
+        "Makes node reached from parent by action instead"
+        self.parents[node] = parent
+        self.codes[node] = self.actionCode(action)
+
+    def actionCode(self, action):
+        code = self.actionCodes.get(action)
+        if code is None:
+            code = self.actionCodes[action] = len(self.actions)
+            self.actions.append(action)
+        return code
+
+    def path(self, node):
+        "Returns the actions that lead from the start node to node"
+        parents, codes, actions = self.parents, self.codes, self.actions
+        path = []
+        while parents[node] != -1:
+            path.append(actions[codes[node]])
+            node = parents[node]
+        path.reverse()
+        return path
+
+
+def graphSearch(problem, frontier, queueOnce=False):
+    """
+    Searches problem in the order frontier (a util.Stack or util.Queue) hands
+    back node ids.  A state may be queued more than once, but is expanded,
+    and goal tested, only the first time it comes off the frontier.  With
+    queueOnce a state is only queued the first time it is reached, which
+    expands states in the same order when the frontier is first-in
+    first-out, and keeps far fewer nodes.
+    """
+    start = problem.getStartState()
+    nodes = SearchNodes(start)
+    frontier.push(0)
+    # The states expanded so far, and with queueOnce the ones queued too
+    seen = set()
+    if queueOnce:
+        seen.add(start)
+    states = nodes.states
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state = states[node]
+        if not queueOnce:
+            # if we already visited this state, don't visit it again.
+            if state in seen:
+                continue
+            seen.add(state)
+        if problem.isGoalState(state):
+            return nodes.path(node)
+        for successor, action, stepCost in problem.getSuccessors(state):
+            if successor not in seen:
+                if queueOnce:
+                    seen.add(successor)
+                frontier.push(nodes.add(successor, node, action))
+    # return failure
+    return []
+
+
+def bestFirstSearch(problem, priority, getSuccessors=None):
+    """
+    Searches problem expanding the queued state with the lowest
+    priority(state, pathCost) first.  Each state has one node, which is
+    queued at most once; a cheaper path to a queued state rewrites its node
+    and lowers its priority in place.  getSuccessors(state, parent state)
+    replaces problem.getSuccessors if given, with None as the start's
+    parent.
+    """
+    start = problem.getStartState()
+    nodes = SearchNodes(start)
+    frontier = util.IndexedPriorityQueue()
+    frontier.push(0, priority(start, 0))
+    # The node of every state reached so far, and the cheapest known path cost
+    # to each node.  Reached states that are no longer queued have been
+    # expanded.
+    reached = {start: 0}
+    costs = [0]
+    states = nodes.states
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state = states[node]
+        if problem.isGoalState(state):
+            return nodes.path(node)
+        cost = costs[node]
+        if getSuccessors is None:
+            successors = problem.getSuccessors(state)
+        else:
+            parent = nodes.parents[node]
+            successors = getSuccessors(state, states[parent] if parent != -1 else None)
+        for successor, action, stepCost in successors:
+            # calculate the cumulative path cost by adding the parent's path cost to the step cost
+            pathCost = cost + stepCost
+            other = reached.get(successor)
+            if other is None:
+                other = reached[successor] = nodes.add(successor, node, action)
+                costs.append(pathCost)
+            elif other in frontier and pathCost < costs[other]:
+                # Only queued nodes are rewritten, and those are nobody's
+                # parent yet
+                nodes.setParent(other, node, action)
+                costs[other] = pathCost
+            else:
+                # if we already visited this state, don't visit it again
+                continue
+            frontier.update(other, priority(successor, pathCost))
+    # return failure
+    return []
+
+
 def depthFirstSearch(problem):
     """
     Search the deepest nodes in the search tree first.
@@ -88,138 +226,19 @@ def depthFirstSearch(problem):
     print("Is the start a goal?", problem.isGoalState(problem.getStartState()))
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
-    # inititialize starting problem with cost of zero and game initial state
-    node = (problem.getStartState(), None, 0, None);
-    frontier = util.Stack()
-    frontier.push(node)
-    # A set containing visited states
-    explored = set()
-    # The path we will return
-    path = []
-    # Keep looking for the goal state
-    while not problem.isGoalState(node[0]):
-        if frontier.isEmpty():
-            # return failure
-            return []
-        node = frontier.pop()
-        # Path.append(node[1]);
-        if problem.isGoalState(node[0]):
-            # Backtrack to get the solution
-            # append last action
-            path.append(node[1])
-            # as long as action is not none.
-            while node[3] is not None:
-                parent = node[3]
-                action = parent[1]
-                # Don't take None as an action.
-                if action is not None:
-                    path.append(action)
-                node = parent
-            # return the path
-            path.reverse()
-            return path
-        # if we already visited this state, don't visit it again.
-        if node[0] not in explored:
-            # Add a visited state to the explored set.
-            explored.add(node[0])
-            # Add all children to the frontier
-            for child in problem.getSuccessors(node[0]):
-                # Add the quadruple representing (successor, action, cost, Parent)
-                frontier.push((child[0], child[1], child[2], node))
-    return path
-    util.raiseNotDefined()
+    return graphSearch(problem, util.Stack())
 
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
-    node = (problem.getStartState(), None, 0, None)
-    frontier = util.Queue()
-    frontier.push(node)
-    # A set containing visited states
-    explored = set()
-    # The path we will return
-    path = []
-    # Keep looking for the goal state
-    while not problem.isGoalState(node[0]):
-        if frontier.isEmpty():
-            # return failure
-            return []
-        node = frontier.pop()
-        # Path.append(node[1]);
-        if problem.isGoalState(node[0]):
-            # Backtrack to get the solution
-            # append last action
-            path.append(node[1])
-            # as long as action is not none.
-            while node[3] is not None:
-                parent = node[3]
-                action = parent[1]
-                # Don't take None as an action.
-                if action is not None:
-                    path.append(action)
-                node = parent
-            # return the path
-            path.reverse()
-            return path
-        # if we already visited this state, don't visit it again.
-        if node[0] not in explored:
-            # Add a visited state to the explored set.
-            explored.add(node[0])
-            # Add all children to the frontier
-            for child in problem.getSuccessors(node[0]):
-                # Add the quadruple representing (successor, action, cost, Parent)
-                frontier.push((child[0], child[1], child[2], node))
-    return path
-    util.raiseNotDefined()
+    return graphSearch(problem, util.Queue(), queueOnce=True)
 
 
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
-    # Quintuple : our old info, and fifth element = path cost
-    node = (problem.getStartState(), None, 0, None, 0)
-    frontier = util.PriorityQueue()
-    frontier.push(node, node[4])
-    # A set containing visited states
-    explored = set()
-    # The path we will return
-    path = []
-    # Keep looking for the goal state
-    while not problem.isGoalState(node[0]):
-        if frontier.isEmpty():
-            # return failure
-            return []
-        node = frontier.pop()
-        # Path.append(node[1]);
-        if problem.isGoalState(node[0]):
-            # Backtrack to get the solution
-            # append last action
-            path.append(node[1])
-            # as long as action is not none.
-            while node[3] is not None:
-                parent = node[3]
-                action = parent[1]
-                # Don't take None as an action.
-                if action is not None:
-                    path.append(action)
-                node = parent
-            # return the path
-            path.reverse()
-            return path
-        # if we already visited this state, don't visit it again.
-        if node[0] not in explored:
-            # Add a visited state to the explored set.
-            explored.add(node[0])
-            # Add all children to the frontier
-            for child in problem.getSuccessors(node[0]):
-                # calculate the cumulative path cost by adding previous node's path cost to child's individual cost
-                path_cost = node[4] + child[2]
-                # Add the quintuple representing (successor, action, cost, Parent, and path_cost)
-                frontier.push((child[0], child[1], child[2], node, path_cost), path_cost)
-    return path
-
-    util.raiseNotDefined()
+    return bestFirstSearch(problem, lambda state, pathCost: pathCost)
 
 
 def nullHeuristic(state, problem=None):
@@ -233,49 +252,405 @@ def nullHeuristic(state, problem=None):
 def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
-    # Quintuple : our old info, and fifth element = path cost
-    node = (problem.getStartState(), None, 0, None, 0)
-    frontier = util.PriorityQueue()
-    # Add the first node with cost and heuristic
-    frontier.push(node, node[4]+heuristic(node[0], problem))
-    # A set containing visited states
-    explored = set()
-    # The path we will return
-    path = []
-    # Keep looking for the goal state
-    while not problem.isGoalState(node[0]):
-        if frontier.isEmpty():
-            # return failure
-            return []
-        node = frontier.pop()
-        # Path.append(node[1]);
-        if problem.isGoalState(node[0]):
-            # Backtrack to get the solution
-            # append last action
-            path.append(node[1])
-            # as long as action is not none.
-            while node[3] is not None:
-                parent = node[3]
-                action = parent[1]
-                # Don't take None as an action.
-                if action is not None:
-                    path.append(action)
-                node = parent
-            # return the path
-            path.reverse()
-            return path
-        # if we already visited this state, don't visit it again.
-        if node[0] not in explored:
-            # Add a visited state to the explored set.
-            explored.add(node[0])
-            # Add all children to the frontier
-            for child in problem.getSuccessors(node[0]):
-                # calculate the cumulative path cost by adding previous node's path cost to child's individual cost
-                path_cost = node[4] + child[2]
-                # Add the quintuple representing (successor, action, cost, Parent, path cost) with priority path-cost + heuristic.
-                frontier.push((child[0], child[1], child[2], node, path_cost), path_cost + heuristic(child[0],problem))
+    # priority is path cost + heuristic
+    return bestFirstSearch(problem, lambda state, pathCost: pathCost + heuristic(state, problem))
+
+
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+    """
+    A* over the jump points of a grid whose steps all cost the same, which
+    skips the cells a shortest path just passes straight through.  problem
+    must have getJumpSuccessors(state, parent), as PositionSearchProblem
+    does, whose actions are the tuples of moves between jump points.
+    """
+    path = bestFirstSearch(problem, lambda state, pathCost: pathCost + heuristic(state, problem),
+                           problem.getJumpSuccessors)
+    return [action for moves in path for action in moves]
+
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic, maxExpansions=1000000):
+    """
+    Search depth first for paths whose path cost plus heuristic stays within
+    a bound, starting from the start state's estimate and raising the bound
+    to the lowest value that went over it until a goal is found.  Only the
+    current path and its siblings are kept, so memory grows with the depth
+    of the solution rather than the number of states; the price is that
+    states are expanded again on every pass.
+
+    Where paths branch and rejoin, as in open areas, the same states are
+    also expanded once for every path within the bound that reaches them:
+    openMaze with manhattanHeuristic takes 490 thousand expansions where A*
+    takes 535.  So the search gives up and returns failure after
+    maxExpansions expansions over all its passes.
+    """
+    expansions = 0
+    start = problem.getStartState()
+    bound = heuristic(start, problem)
+    while bound != float('inf'):
+        # Each frame is (state, path cost, successors not yet tried)
+        stack = [(start, 0, None)]
+        # The states and actions on the current path
+        onPath = {start}
+        path = []
+        nextBound = float('inf')
+        while stack:
+            state, cost, successors = stack[-1]
+            if successors is None:
+                if problem.isGoalState(state):
+                    return path
+                expansions += 1
+                if expansions > maxExpansions:
+                    return []
+                successors = iter(problem.getSuccessors(state))
+                stack[-1] = (state, cost, successors)
+            for successor, action, stepCost in successors:
+                if successor in onPath:
+                    continue
+                pathCost = cost + stepCost
+                estimate = pathCost + heuristic(successor, problem)
+                if estimate > bound:
+                    nextBound = min(nextBound, estimate)
+                    continue
+                stack.append((successor, pathCost, None))
+                onPath.add(successor)
+                path.append(action)
+                break
+            else:
+                # Every successor has been tried: back up
+                stack.pop()
+                onPath.discard(state)
+                if path:
+                    path.pop()
+        bound = nextBound
+    # return failure
+    return []
+
+
+class MemoryNode:
+    """
+    A node of simplifiedMemoryBoundedAStarSearch.  f is the lowest path
+    cost plus heuristic known for any path through the node: its estimate
+    when generated, and once expanded the lowest f of its successors.
+    forgotten maps the place in getSuccessors' list of each successor that
+    was dropped to save memory to its f, so it is regenerated with that f,
+    or never again if its f is infinite.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'index', 'cost', 'depth', 'f',
+                 'children', 'forgotten', 'key', 'alive')
+
+    def __init__(self, state, parent, action, index, cost, depth, f):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.index = index
+        self.cost = cost
+        self.depth = depth
+        self.f = f
+        # The children in memory, or None until the node is expanded
+        self.children = None
+        self.forgotten = None
+        # The priority the node is queued for expansion under, or None
+        self.key = None
+        self.alive = True
+
+    def regenerateKey(self):
+        "Returns the lowest f of the forgotten successors worth regenerating"
+        return min(f for f in self.forgotten.values()) if self.forgotten else float('inf')
+
+    def path(self):
+        "Returns the actions that lead from the start to this node"
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append(node.action)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+def compactQueue(entries, isCurrent):
+    """
+    Returns the heap of the entries (priority, ..., node) whose node is still
+    in memory and for which isCurrent(node, priority), one per node.
+    """
+    kept = {}
+    for entry in entries:
+        node = entry[-1]
+        if node.alive and id(node) not in kept and isCurrent(node, entry[0]):
+            kept[id(node)] = entry
+    entries = list(kept.values())
+    heapq.heapify(entries)
+    return entries
+
+
+def simplifiedMemoryBoundedAStarSearch(problem, heuristic=nullHeuristic, maxNodes=100000, maxExpansions=None):
+    """
+    Search like A*, but keep at most maxNodes nodes in memory (SMA*).  When
+    the budget is full the leaf with the highest f is forgotten; its parent
+    remembers that f and regenerates it once nothing better is left.  Given
+    a consistent heuristic the path found is optimal among those short
+    enough to fit in the budget.
+
+    A state is not generated again while a node in memory reaches it at no
+    greater cost, which also keeps a path from looping.
+
+    With a budget well below the number of nodes A* would keep, the same
+    subtrees are forgotten and regenerated over and over: trickySearch with
+    maxNodes=500 takes 8.9 million expansions where A* takes 9.5 thousand.
+    So the search gives up and returns failure after maxExpansions
+    expansions, 100 * maxNodes unless given.
+    """
+    if maxExpansions == None:
+        maxExpansions = 100 * maxNodes
+    expansions = 0
+    inf = float('inf')
+    start = problem.getStartState()
+    root = MemoryNode(start, None, None, None, 0, 0, heuristic(start, problem))
+    # The cheapest node in memory for each state
+    inMemory = {start: root}
+    size = 1
+    # toExpand holds (key, -depth, count, node) for the nodes with successors
+    # to generate, lowest key and then deepest first; leaves holds (-f, depth,
+    # count, node) for the leaves, highest f and then shallowest first.
+    # Entries for nodes that have changed since are skipped.
+    toExpand, leaves = [], []
+    order = itertools.count()
+
+    def queue(node, key):
+        node.key = key
+        heapq.heappush(toExpand, (key, -node.depth, next(order), node))
+
+    def queueLeaf(node):
+        heapq.heappush(leaves, (-node.f, node.depth, next(order), node))
+
+    def backUp(node):
+        # Pass a change in the successors' f on to node and its ancestors
+        while node is not None and node.children is not None:
+            f = min([child.f for child in node.children] + list(node.forgotten.values()) + [inf])
+            if f == node.f:
+                return
+            node.f = f
+            if not node.children:
+                queueLeaf(node)
+            node = node.parent
+
+    queue(root, root.f)
+    queueLeaf(root)
+    while toExpand:
+        key, negDepth, count, node = heapq.heappop(toExpand)
+        if not node.alive or node.key != key:
+            continue
+        if key == inf:
+            break
+        node.key = None
+        if node.children is None:
+            if problem.isGoalState(node.state):
+                return node.path()
+            node.children = []
+            node.forgotten = {}
+        expansions += 1
+        if expansions > maxExpansions:
+            break
+
+        # Generate the successors that are neither in memory nor known to be
+        # dead ends
+        known = set(child.index for child in node.children)
+        for index, (successor, action, stepCost) in enumerate(problem.getSuccessors(node.state)):
+            if index in known:
+                continue
+            remembered = node.forgotten.pop(index, None)
+            if remembered == inf:
+                node.forgotten[index] = inf
+                continue
+            pathCost = node.cost + stepCost
+            other = inMemory.get(successor)
+            if other is not None:
+                if other.cost <= pathCost:
+                    continue
+                # Key the entry by the new node's state, so it does not keep
+                # the old one's alive
+                del inMemory[successor]
+            depth = node.depth + 1
+            if depth >= maxNodes - 1 and not problem.isGoalState(successor):
+                # No path through it fits in memory
+                f = inf
+            elif remembered is not None:
+                f = remembered
+            else:
+                f = max(node.f, pathCost + heuristic(successor, problem))
+            child = MemoryNode(successor, node, action, index, pathCost, depth, f)
+            node.children.append(child)
+            inMemory[successor] = child
+            size += 1
+            if f != inf:
+                queue(child, f)
+            queueLeaf(child)
+        backUp(node)
+        if not node.children:
+            queueLeaf(node)
+
+        # Drop the skipped entries once there are half as many as nodes, so
+        # the queues stay within the budget too
+        if len(toExpand) > size + size // 2 + 16:
+            toExpand = compactQueue(toExpand, lambda node, key: node.key == key)
+        if len(leaves) > size + size // 2 + 16:
+            leaves = compactQueue(leaves, lambda node, negF: not node.children and node.f == -negF)
+
+        # Forget the worst leaves until the rest fit
+        while size > maxNodes and leaves:
+            negF, depth, count, leaf = heapq.heappop(leaves)
+            if not leaf.alive or leaf.children or leaf.parent is None or -negF != leaf.f:
+                continue
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            parent.forgotten[leaf.index] = leaf.f
+            if inMemory.get(leaf.state) is leaf:
+                del inMemory[leaf.state]
+            # Queue entries may still point at the node until they are
+            # dropped, so let go of its state and ancestors now
+            leaf.alive = False
+            leaf.state = leaf.parent = leaf.action = leaf.children = leaf.forgotten = None
+            size -= 1
+            key = parent.regenerateKey()
+            if key != inf and (parent.key is None or key < parent.key):
+                queue(parent, key)
+            backUp(parent)
+            if not parent.children:
+                queueLeaf(parent)
+    # return failure
+    return []
+
+
+class SearchFront:
+    """
+    One direction of a bidirectional search: the problem it searches, its
+    nodes, the node of every state it has reached and the path cost to each
+    node.
+    """
+
+    __slots__ = ('problem', 'nodes', 'reached', 'costs', 'frontier')
+
+    def __init__(self, problem):
+        start = problem.getStartState()
+        self.problem = problem
+        self.nodes = SearchNodes(start)
+        self.reached = {start: 0}
+        self.costs = [0]
+        self.frontier = None
+
+
+def meetingPath(forward, forwardNode, backward, backwardNode):
+    """
+    Returns the actions from the start to the goal through the state where
+    forwardNode and backwardNode meet.  The backward front's actions lead
+    forwards, towards the goal, so its half only needs reversing.
+    """
+    path = forward.nodes.path(forwardNode)
+    path.extend(reversed(backward.nodes.path(backwardNode)))
     return path
-    util.raiseNotDefined()
+
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Search breadth first from the start and back from the goal at once, a
+    whole layer at a time on whichever side has the smaller frontier, until
+    the two meet.  Every step must cost the same, and problem must have a
+    single goal and a reverse() giving the search from that goal back to the
+    start, as PositionSearchProblem does.
+    """
+    fronts = [SearchFront(problem), SearchFront(problem.reverse())]
+    if fronts[1].problem.getStartState() in fronts[0].reached:
+        return []
+    for front in fronts:
+        front.frontier = [0]
+    while fronts[0].frontier and fronts[1].frontier:
+        side = 0 if len(fronts[0].frontier) <= len(fronts[1].frontier) else 1
+        front, other = fronts[side], fronts[1 - side]
+        nodes, reached, costs = front.nodes, front.reached, front.costs
+        best = None
+        layer = []
+        for node in front.frontier:
+            cost = costs[node] + 1
+            for successor, action, stepCost in front.problem.getSuccessors(nodes.states[node]):
+                if successor in reached:
+                    continue
+                child = reached[successor] = nodes.add(successor, node, action)
+                costs.append(cost)
+                layer.append(child)
+                meeting = other.reached.get(successor)
+                if meeting is not None and (best is None or cost + other.costs[meeting] < best[0]):
+                    best = (cost + other.costs[meeting], child, meeting)
+        front.frontier = layer
+        # Every path shorter than one found in this layer would have met in
+        # an earlier layer, so the best meeting in it is a shortest path
+        if best is not None:
+            cost, child, meeting = best
+            if side == 0:
+                return meetingPath(front, child, other, meeting)
+            return meetingPath(other, meeting, front, child)
+    # return failure
+    return []
+
+
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Search with A* from the start towards the goal and from the goal back
+    towards the start at once, expanding whichever side has the smaller
+    frontier, until the two frontiers cannot lead to a cheaper path than the
+    best meeting found so far.
+
+    heuristic is called with each side's problem, so it estimates the cost
+    to that side's goal, and must be consistent.  Each side orders its
+    frontier by path cost plus half the difference of the two estimates,
+    which keeps both searches ranking paths the same way, so they can stop
+    as soon as their lowest priorities add up to the best meeting's cost.
+    problem needs a reverse() as for bidirectionalBreadthFirstSearch.
+    """
+    fronts = [SearchFront(problem), SearchFront(problem.reverse())]
+    if fronts[1].problem.getStartState() in fronts[0].reached:
+        return []
+
+    def potential(state, side):
+        estimates = [heuristic(state, front.problem) for front in fronts]
+        return (estimates[side] - estimates[1 - side]) / 2.0
+
+    for side, front in enumerate(fronts):
+        front.frontier = util.IndexedPriorityQueue()
+        front.frontier.push(0, potential(front.problem.getStartState(), side))
+    # (cost, forward node, backward node) of the cheapest meeting so far
+    best = None
+    while not fronts[0].frontier.isEmpty() and not fronts[1].frontier.isEmpty():
+        if best is not None and fronts[0].frontier.topPriority() + fronts[1].frontier.topPriority() >= best[0]:
+            break
+        side = 0 if len(fronts[0].frontier) <= len(fronts[1].frontier) else 1
+        front, other = fronts[side], fronts[1 - side]
+        nodes, reached, costs, frontier = front.nodes, front.reached, front.costs, front.frontier
+        node = frontier.pop()
+        cost = costs[node]
+        for successor, action, stepCost in front.problem.getSuccessors(nodes.states[node]):
+            pathCost = cost + stepCost
+            child = reached.get(successor)
+            if child is None:
+                child = reached[successor] = nodes.add(successor, node, action)
+                costs.append(pathCost)
+            elif child in frontier and pathCost < costs[child]:
+                nodes.setParent(child, node, action)
+                costs[child] = pathCost
+            else:
+                continue
+            frontier.update(child, pathCost + potential(successor, side))
+            meeting = other.reached.get(successor)
+            if meeting is not None and (best is None or pathCost + other.costs[meeting] < best[0]):
+                if side == 0:
+                    best = (pathCost + other.costs[meeting], child, meeting)
+                else:
+                    best = (pathCost + other.costs[meeting], meeting, child)
+    if best is None:
+        # return failure
+        return []
+    cost, forwardNode, backwardNode = best
+    return meetingPath(fronts[0], forwardNode, fronts[1], backwardNode)
 
 
 # Abbreviations
@@ -283,3 +658,8 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalBreadthFirstSearch
+biastar = bidirectionalAStarSearch
+jps = jumpPointSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = simplifiedMemoryBoundedAStarSearch
@@ -37,6 +37,7 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
 import util
 import time
 import search
@@ -71,20 +72,34 @@ class SearchAgent(Agent):
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
 
+    maxNodes is the node budget for the memory-bounded searches, such as
+    smastar, and maxExpansions the number of expansions smastar or idastar
+    makes before it gives up.  SMA* is only practical with a budget close to the number of
+    nodes A* keeps: far below it, it regenerates the same nodes until it
+    runs out of expansions and returns failure.
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', maxNodes=None, maxExpansions=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        options = {}
+        if maxNodes != None:
+            if 'maxNodes' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a node budget.')
+            options['maxNodes'] = int(maxNodes)
+        if maxExpansions != None:
+            if 'maxExpansions' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take an expansion limit.')
+            options['maxExpansions'] = int(maxExpansions)
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **options)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -94,7 +109,7 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **options)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -115,6 +130,9 @@ class SearchAgent(Agent):
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem
         self.actions = self.searchFunction(problem)  # Find a path
+        if not self.actions and not problem.isGoalState(problem.getStartState()):
+            # Rather than stand still forever
+            raise Exception('The search found no path to a goal')
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
@@ -136,6 +154,11 @@ class SearchAgent(Agent):
             return Directions.STOP
 
 
+def unitCost(state):
+    "The cost function of searches whose steps all cost the same"
+    return 1
+
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -147,7 +170,7 @@ class PositionSearchProblem(search.SearchProblem):
     Note: this search problem is fully specified; you should NOT change it.
     """
 
-    def __init__(self, gameState, costFn=lambda x: 1, goal=(1, 1), start=None, warn=True, visualize=True):
+    def __init__(self, gameState, costFn=unitCost, goal=(1, 1), start=None, warn=True, visualize=True):
         """
         Stores the start and goal.
 
@@ -213,6 +236,106 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getPredecessors(self, state):
+        """
+        Returns the states one step before state, the actions that lead from
+        them to state, and the cost of those steps, as triples like
+        getSuccessors.
+        """
+
+        predecessors = []
+        cost = self.costFn(state)
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+            if not self.walls[prevx][prevy]:
+                predecessors.append(((prevx, prevy), action, cost))
+
+        # Bookkeeping for display purposes
+        self._expanded += 1  # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
+    def reverse(self):
+        "Returns the search from the goal back to the start, for bidirectional search"
+        return ReversePositionSearchProblem(self)
+
+    def getJumpSuccessors(self, state, parent=None):
+        """
+        Returns the jump points reached from state by moving in a straight
+        line, for search.jumpPointSearch, as triples like getSuccessors
+        except that each action is the tuple of moves to the jump point.
+
+        parent is the jump point state was reached from, or None at the
+        start.  Shortest paths are taken to make their vertical moves before
+        their horizontal ones wherever either order is open, so after a
+        horizontal move only the same direction, and a vertical one that a
+        wall just ended, need searching.  That only holds when steps all cost
+        the same, so with any costFn but unitCost each successor from
+        getSuccessors is returned as a jump of one move instead.
+        """
+        if self.costFn is not unitCost:
+            return [(nextState, (action,), cost)
+                    for nextState, action, cost in self.getSuccessors(state)]
+
+        x, y = state
+        if parent == None:
+            vectors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        elif parent[0] == x:
+            dy = 1 if y > parent[1] else -1
+            vectors = [(0, dy), (1, 0), (-1, 0)]
+        else:
+            dx = 1 if x > parent[0] else -1
+            vectors = [(dx, 0)]
+            for dy in (1, -1):
+                if self.walls[x - dx][y + dy] and not self.walls[x][y + dy]:
+                    vectors.append((0, dy))
+
+        successors = []
+        for dx, dy in vectors:
+            jumpPoint = self.jump(x, y, dx, dy)
+            if jumpPoint != None:
+                nextState, steps, cost = jumpPoint
+                action = Actions.vectorToDirection((dx, dy))
+                successors.append((nextState, (action,) * steps, cost))
+
+        # Bookkeeping for display purposes
+        self._expanded += 1  # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def jump(self, x, y, dx, dy):
+        """
+        Moves from (x, y) by (dx, dy) until reaching a jump point: a goal, a
+        cell beside the end of a wall when moving horizontally, or a cell
+        from which a horizontal jump finds one when moving vertically.
+        Returns the jump point, the number of moves and their cost, or None
+        if a wall comes first.
+        """
+        walls = self.walls
+        steps, cost = 0, 0
+        while True:
+            x, y = x + dx, y + dy
+            if walls[x][y]:
+                return None
+            steps += 1
+            cost += self.costFn((x, y))
+            if self.isGoalState((x, y)):
+                return (x, y), steps, cost
+            if dx != 0:
+                if ((walls[x - dx][y + 1] and not walls[x][y + 1]) or
+                        (walls[x - dx][y - 1] and not walls[x][y - 1])):
+                    return (x, y), steps, cost
+            elif self.jump(x, y, 1, 0) != None or self.jump(x, y, -1, 0) != None:
+                return (x, y), steps, cost
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -230,6 +353,32 @@ class PositionSearchProblem(search.SearchProblem):
         return cost
 
 
+class ReversePositionSearchProblem(search.SearchProblem):
+    """
+    A PositionSearchProblem searched backwards, from its goal to its start.
+    The successors of a state are its predecessors in the original problem,
+    each with the action that leads from it forwards, and expansions are
+    counted by the original problem.  The start and goal attributes match
+    the original's, so position heuristics estimate the distance back to
+    the start.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.walls = problem.walls
+        self.startState = problem.goal
+        self.goal = problem.getStartState()
+
+    def getStartState(self):
+        return self.startState
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return self.problem.getPredecessors(state)
+
+
 class StayEastSearchAgent(SearchAgent):
     """
     An agent for position search with a cost function that penalizes being in
@@ -434,15 +583,26 @@ class FoodSearchProblem:
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
+    A search state in this problem is a tuple ( pacmanPosition, foodMask ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodMask:       an int with bit i set while the food at foodCells[i] remains
+
+    foodCells lists the food of the starting state, so eating a dot clears one
+    bit, the goal test is foodMask == 0 and states hash as fast as an int.
+    getFoodGrid(state) gives a read-only Grid-like view of a state's food.
     """
 
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        food = startingGameState.getFood()
+        self.foodCells = food.asList()
+        self.foodBits = dict((cell, 1 << i) for i, cell in enumerate(self.foodCells))
+        self.foodWidth, self.foodHeight = food.width, food.height
+        self.start = (startingGameState.getPacmanPosition(), (1 << len(self.foodCells)) - 1)
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
+        self._moves = {}  # position -> [(direction, next position, mask keeping all other food)]
+        for position in self.walls.asList(False):
+            self._moves[position] = self.getMoves(position)
         self._expanded = 0  # DO NOT CHANGE
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
@@ -450,21 +610,31 @@ class FoodSearchProblem:
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1] == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
-        successors = []
         self._expanded += 1  # DO NOT CHANGE
+        position, foodMask = state
+        return [((nextPosition, foodMask & keep), direction, 1) for direction, nextPosition, keep in self._moves[position]]
+
+    def getMoves(self, position):
+        """
+        Returns the legal moves from position as (direction, next position,
+        keep) triples, where foodMask & keep eats the food at next position.
+        """
+        moves = []
         for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
+            x, y = position
             dx, dy = Actions.directionToVector(direction)
             nextx, nexty = int(x + dx), int(y + dy)
             if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append((((nextx, nexty), nextFood), direction, 1))
-        return successors
+                moves.append((direction, (nextx, nexty), ~self.foodBits.get((nextx, nexty), 0)))
+        return moves
+
+    def getFoodGrid(self, state):
+        "Returns a read-only Grid-like view of the food left in state."
+        return FoodGridView(self, state[1])
 
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
@@ -481,6 +651,98 @@ class FoodSearchProblem:
         return cost
 
 
+class FoodGridView:
+    """
+    A read-only view of a FoodSearchProblem food mask that reads like the
+    food Grid it stands for: grid[x][y], asList(), count(), width and height
+    all work, and it compares and hashes equal to a Grid with the same
+    contents.  copy() returns a writable BitGrid.
+    """
+    __slots__ = ('problem', 'mask', 'width', 'height')
+
+    def __init__(self, problem, mask):
+        self.problem = problem
+        self.mask = mask
+        self.width = problem.foodWidth
+        self.height = problem.foodHeight
+
+    def __getitem__(self, x):
+        if x < 0: x += self.width
+        if x < 0 or x >= self.width: raise IndexError('FoodGridView column out of range')
+        return _FoodGridViewColumn(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def _get_data(self):
+        "A list of lists copy of the cells, for code that reads Grid.data."
+        return self.toBitGrid().data
+    data = property(_get_data)
+
+    def asList(self, key=True):
+        if not key:
+            return self.toBitGrid().asList(False)
+        cells = self.problem.foodCells
+        mask = self.mask
+        foods = []
+        while mask:
+            low = mask & -mask
+            foods.append(cells[low.bit_length() - 1])
+            mask ^= low
+        return foods
+
+    def count(self, item=True):
+        full = bin(self.mask).count('1')
+        if item: return full
+        return self.width * self.height - full
+
+    def toBitGrid(self):
+        grid = BitGrid(self.width, self.height)
+        for x, y in self.asList():
+            grid[x][y] = True
+        return grid
+
+    def copy(self):
+        return self.toBitGrid()
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, FoodGridView) and other.problem is self.problem:
+            return self.mask == other.mask
+        return self.toBitGrid() == other
+
+    def __hash__(self):
+        return hash(self.toBitGrid())
+
+    def __str__(self):
+        return str(self.toBitGrid())
+
+
+class _FoodGridViewColumn:
+    """
+    A view of one column of a FoodGridView, so that grid[x][y] reads the mask.
+    """
+    __slots__ = ('view', 'x')
+
+    def __init__(self, view, x):
+        self.view = view
+        self.x = x
+
+    def __getitem__(self, y):
+        if y < 0: y += self.view.height
+        if y < 0 or y >= self.view.height: raise IndexError('FoodGridView row out of range')
+        return self.view.mask & self.view.problem.foodBits.get((self.x, y), 0) != 0
+
+    def __len__(self):
+        return self.view.height
+
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
 
@@ -502,9 +764,9 @@ def foodHeuristic(state, problem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a tuple ( pacmanPosition, foodMask ); problem.getFoodGrid(state)
+    turns it into a Grid-like view of either True or False (see game.py). You can
+    call foodGrid.asList() to get a list of food coordinates instead.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -517,7 +779,7 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
+    position, foodGrid = state[0], problem.getFoodGrid(state)
     "*** YOUR CODE HERE ***"
 
     # a list of unvisited foods made by expressing the food grid as a list.
@@ -642,7 +904,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
         self.startState = gameState.getPacmanPosition()
-        self.costFn = lambda x: 1
+        self.costFn = unitCost
         self._visited, self._visitedlist, self._expanded = {}, [], 0  # DO NOT CHANGE
 
     def isGoalState(self, state):
@@ -684,4 +946,4 @@ def mazeDistance(point1, point2, gameState):
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
     prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return len(search.jps(prob))
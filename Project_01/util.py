@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 
 
 class FixedRandom:
@@ -150,18 +151,18 @@ class Stack:
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.append(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
@@ -173,6 +174,11 @@ class PriorityQueue:
       has a priority associated with it and the client is usually interested
       in quick retrieval of the lowest-priority item in the queue. This
       data structure allows O(1) access to the lowest-priority item.
+
+      push always adds a new entry, so an item may be queued more than once.
+      update and the in operator search the heap for the item; for a queue
+      that keeps each item once and lowers its priority in O(log n), use
+      IndexedPriorityQueue.
     """
     def  __init__(self):
         self.heap = []
@@ -190,6 +196,19 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def topPriority(self):
+        "Returns the priority of the item that pop would return"
+        return self.heap[0][0]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        for (p, c, i) in self.heap:
+            if i == item:
+                return True
+        return False
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -205,6 +224,129 @@ class PriorityQueue:
         else:
             self.push(item, priority)
 
+class IndexedPriorityQueue(PriorityQueue):
+    """
+      A PriorityQueue that queues each item at most once, for searches that
+      lower the priority of queued states.
+
+      The queue is a binary heap plus a map from each item to its place in
+      it, so items must be hashable and pushing an item that is already
+      queued is the same as update.  Lowering the priority of a queued item
+      moves its entry up the heap in O(log n), and items of equal priority
+      come out in the order they were last pushed or lowered.
+
+      With lazy=True a lowered item gets a fresh heap entry instead and the
+      old one is skipped when it reaches the top.  The heap then holds stale
+      entries, but every heap operation runs in heapq's C code.
+    """
+    def  __init__(self, lazy=False):
+        PriorityQueue.__init__(self)
+        self.lazy = lazy
+        # item -> its position in the heap, or its live entry if lazy
+        self.index = {}
+
+    def push(self, item, priority):
+        if item in self.index:
+            self.update(item, priority)
+            return
+        entry = (priority, self.count, item)
+        self.count += 1
+        if self.lazy:
+            self.index[item] = entry
+            heapq.heappush(self.heap, entry)
+        else:
+            self.heap.append(entry)
+            self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        heap = self.heap
+        if self.lazy:
+            while True:
+                entry = heapq.heappop(heap)
+                item = entry[2]
+                if self.index.get(item) is entry:
+                    del self.index[item]
+                    return item
+        last = heap.pop()
+        if heap:
+            entry = heap[0]
+            heap[0] = last
+            self._siftDown(0)
+        else:
+            entry = last
+        del self.index[entry[2]]
+        return entry[2]
+
+    def isEmpty(self):
+        return len(self.index) == 0
+
+    def topPriority(self):
+        "Returns the priority of the item that pop would return"
+        heap = self.heap
+        if self.lazy:
+            while self.index.get(heap[0][2]) is not heap[0]:
+                heapq.heappop(heap)
+        return heap[0][0]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def update(self, item, priority):
+        # If item already in priority queue with higher priority, update its priority.
+        # If item already in priority queue with equal or lower priority, do nothing.
+        # If item not in priority queue, do the same thing as self.push.
+        if item not in self.index:
+            self.push(item, priority)
+            return
+        entry = (priority, self.count, item)
+        if self.lazy:
+            if self.index[item][0] <= priority:
+                return
+            self.count += 1
+            self.index[item] = entry
+            heapq.heappush(self.heap, entry)
+        else:
+            position = self.index[item]
+            if self.heap[position][0] <= priority:
+                return
+            self.count += 1
+            self.heap[position] = entry
+            self._siftUp(position)
+
+    def _siftUp(self, position):
+        heap, index = self.heap, self.index
+        entry = heap[position]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = heap[parentPosition]
+            if not entry < parent:
+                break
+            heap[position] = parent
+            index[parent[2]] = position
+            position = parentPosition
+        heap[position] = entry
+        index[entry[2]] = position
+
+    def _siftDown(self, position):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[position]
+        child = 2 * position + 1
+        while child < size:
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[position] = heap[child]
+            index[heap[position][2]] = position
+            position = child
+            child = 2 * position + 1
+        heap[position] = entry
+        index[entry[2]] = position
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
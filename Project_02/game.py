@@ -21,8 +21,10 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
+import contextlib
 import time
 import os
+import random
 import traceback
 import sys
 
@@ -292,6 +294,9 @@ class Grid:
                 bools.append(False)
         return bools
 
+    def toBitGrid(self):
+        return BitGrid.fromGrid(self)
+
 
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1, 2)):
@@ -299,6 +304,147 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation=bitRep[2:])
 
+
+class BitGrid:
+    """
+    A boolean Grid backed by a single Python int.  Cell (x,y) is bit
+    x * height + y, the same cell order used by Grid.__hash__ and packBits, so
+    a BitGrid hashes and compares equal to a Grid with the same contents.
+
+    Data is still accessed via grid[x][y].  Since ints are immutable, copy()
+    just shares the int and a write rebinds it, which makes copies O(1) and
+    copy-on-write.  count() is a popcount and __hash__ hashes the int.
+    """
+
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        if initialValue:
+            bits = (1 << (width * height)) - 1
+        self.bits = bits
+
+    def fromGrid(grid):
+        """
+        Builds a BitGrid with the same contents as a (list backed) Grid.
+        """
+        bits = 0
+        base = 1
+        for column in grid.data:
+            for cell in column:
+                if cell:
+                    bits |= base
+                base <<= 1
+        return BitGrid(grid.width, grid.height, bits=bits)
+    fromGrid = staticmethod(fromGrid)
+
+    def toGrid(self):
+        g = Grid(self.width, self.height)
+        g.data = self.data
+        return g
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if x < 0 or x >= self.width:
+            raise IndexError('BitGrid column out of range')
+        return _BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y in range(self.height):
+            _BitGridColumn(self, x)[y] = column[y]
+
+    def __len__(self):
+        return self.width
+
+    def _get_data(self):
+        """
+        A list of lists copy of the cells, for code that reads Grid.data.
+        Writes to it are not reflected in the BitGrid.
+        """
+        h = self.height
+        cells = self._cells(self.bits)
+        return [[c == '1' for c in cells[x * h:(x + 1) * h]]
+                for x in range(self.width)]
+    data = property(_get_data)
+
+    def _cells(self, bits):
+        # One '0'/'1' character per cell, cell 0 first
+        return bin(bits)[2:].zfill(self.width * self.height)[::-1]
+
+    def __str__(self):
+        return str(self.toGrid())
+
+    def __eq__(self, other):
+        if other == None:
+            return False
+        if isinstance(other, BitGrid):
+            return (self.bits == other.bits and self.width == other.width
+                    and self.height == other.height)
+        return self.data == other.data
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        return BitGrid(self.width, self.height, bits=self.bits)
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        # The bits are immutable, so a shallow copy is already a full copy
+        return self.copy()
+
+    def count(self, item=True):
+        full = bin(self.bits).count('1')
+        if item:
+            return full
+        return self.width * self.height - full
+
+    def asList(self, key=True):
+        h = self.height
+        want = '1' if key else '0'
+        return [(i // h, i % h)
+                for i, c in enumerate(self._cells(self.bits)) if c == want]
+
+    def packBits(self):
+        return self.toGrid().packBits()
+
+
+class _BitGridColumn:
+    """
+    A view of one column of a BitGrid, so that grid[x][y] reads and writes
+    the underlying bits.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.grid.height
+        if y < 0 or y >= self.grid.height:
+            raise IndexError('BitGrid row out of range')
+        return (self.grid.bits >> (self.offset + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if y < 0:
+            y += self.grid.height
+        if y < 0 or y >= self.grid.height:
+            raise IndexError('BitGrid row out of range')
+        mask = 1 << (self.offset + y)
+        if value:
+            self.grid.bits |= mask
+        else:
+            self.grid.bits &= ~mask
+
+    def __len__(self):
+        return self.grid.height
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -393,20 +539,50 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+# Zobrist keys for the board: one random 64 bit key per food cell and per
+# capsule position, drawn lazily from a private generator so that hashing
+# never disturbs the seeded game randomness.
+_zobristRandom = random.Random(188)
+ZOBRIST_FOOD = {}
+ZOBRIST_CAPSULES = {}
+
+
+def zobristKey(table, position):
+    key = table.get(position)
+    if key == None:
+        key = table[position] = _zobristRandom.getrandbits(64)
+    return key
+
+
 class GameStateData:
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        Food, capsules and agent states are shared with the predecessor
+        (copy-on-write): the game rules replace the food grid and capsule list
+        rather than editing them, and take agent states through
+        getMutableAgentState, which copies a shared one before it is changed.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._sharedAgents = prevState._shareAgentStates()
+            self._copyHashFrom(prevState)
+        else:
+            self._sharedAgents = []
+            self._boardHash = 0
+            self._hashedFood = None
+            self._agentHashes = None
+
+        self._resetMoveInfo()
 
+    def _resetMoveInfo(self):
         self._foodEaten = None
         self._foodAdded = None
         self._capsuleEaten = None
@@ -415,14 +591,84 @@ class GameStateData:
         self._win = False
         self.scoreChange = 0
 
+    def _shareAgentStates(self):
+        """
+        Marks the agent states as shared with a new state and returns the
+        flags for it.
+        """
+        self._sharedAgents = [True for a in self.agentStates]
+        return self._sharedAgents[:]
+
+    def getMutableAgentState(self, index):
+        """
+        Returns agentStates[index] for writing, copying it first if it is still
+        shared with another state.
+        """
+        if self._sharedAgents[index]:
+            self.agentStates[index] = self.agentStates[index].copy()
+            self._sharedAgents[index] = False
+        return self.agentStates[index]
+
+    def checkpoint(self):
+        """
+        Returns a token that restore() uses to undo whatever the game rules
+        change in place on this state.  Agent states are marked shared, so the
+        rules copy them instead of writing into the ones the token keeps.
+        """
+        agentHashes = self._agentHashes
+        if agentHashes != None:
+            agentHashes = agentHashes[:]
+        token = (self.food, self.capsules, self.agentStates[:], self._eaten,
+                 self.score, self.scoreChange, self._foodEaten, self._foodAdded,
+                 self._capsuleEaten, self._agentMoved, self._lose, self._win,
+                 self._boardHash, self._hashedFood, agentHashes)
+        self._shareAgentStates()
+        return token
+
+    def restore(self, token):
+        (self.food, self.capsules, agentStates, self._eaten,
+         self.score, self.scoreChange, self._foodEaten, self._foodAdded,
+         self._capsuleEaten, self._agentMoved, self._lose, self._win,
+         self._boardHash, self._hashedFood, self._agentHashes) = token
+        self.agentStates = agentStates[:]
+        self._shareAgentStates()
+
+    def view(self):
+        """
+        Returns a view of this data for an agent.  Its food grid, capsule list
+        and agent states are its own, so nothing written to the view reaches
+        this data; copying a BitGrid only shares its bits until one is written.
+        """
+        sharedAgents = self._sharedAgents
+        state = GameStateData(self)
+        self._sharedAgents = sharedAgents  # The view takes copies, not these
+        state.food = self.food.copy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._sharedAgents = [False for a in self.agentStates]
+        if self._hashedFood is self.food:
+            state._hashedFood = state.food
+        state._agentMoved = self._agentMoved
+        state._foodEaten = self._foodEaten
+        state._foodAdded = self._foodAdded
+        state._capsuleEaten = self._capsuleEaten
+        state._lose = self._lose
+        state._win = self._win
+        state.scoreChange = self.scoreChange
+        return state
+
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._sharedAgents = [False for a in self.agentStates]
+        state.layout = self.layout  # Layouts are immutable
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
         state._capsuleEaten = self._capsuleEaten
+        state._copyHashFrom(self)
         return state
 
     def copyAgentStates(self, agentStates):
@@ -431,6 +677,62 @@ class GameStateData:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def _copyHashFrom(self, other):
+        """
+        Carries the incremental hash over from a state with the same contents.
+        """
+        self._boardHash = other._boardHash
+        if other._hashedFood is other.food:
+            self._hashedFood = self.food
+        else:
+            self._hashedFood = None
+        if other._agentHashes == None:
+            self._agentHashes = None
+        else:
+            self._agentHashes = other._agentHashes[:]
+
+    def _rehashBoard(self):
+        food = self.food
+        if type(food) == type((1, 2)):
+            food = reconstituteGrid(food)
+        h = 0
+        for position in food.asList():
+            h ^= zobristKey(ZOBRIST_FOOD, position)
+        for position in self.capsules:
+            h ^= zobristKey(ZOBRIST_CAPSULES, position)
+        self._boardHash = h
+        self._hashedFood = self.food
+
+    def _agentHash(self, index):
+        agentState = self.agentStates[index]
+        conf = agentState.configuration
+        if conf == None:
+            return hash((index, None, None, agentState.scaredTimer))
+        return hash((index, conf.pos, conf.direction, agentState.scaredTimer))
+
+    def updateFoodHash(self, position):
+        """
+        Folds a change of the food at position into the hash.  Call it right
+        after flipping that cell (and after replacing self.food by a copy).
+        """
+        if self._hashedFood != None:
+            self._boardHash ^= zobristKey(ZOBRIST_FOOD, position)
+            self._hashedFood = self.food
+
+    def updateCapsuleHash(self, position):
+        """
+        Folds the removal (or addition) of the capsule at position into the hash.
+        """
+        self._boardHash ^= zobristKey(ZOBRIST_CAPSULES, position)
+
+    def updateAgentHash(self, index):
+        """
+        Refreshes the hash of one agent after its configuration or scared
+        timer changed.
+        """
+        if self._agentHashes != None:
+            self._agentHashes[index] = self._agentHash(index)
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -438,6 +740,8 @@ class GameStateData:
         if other == None:
             return False
         # TODO Check for type of other
+        if hash(self) != hash(other):
+            return False
         if not self.agentStates == other.agentStates:
             return False
         if not self.food == other.food:
@@ -451,14 +755,19 @@ class GameStateData:
     def __hash__(self):
         """
         Allows states to be keys of dictionaries.
+
+        The food and capsule part is a Zobrist hash kept up to date by the
+        game rules, so hashing does not walk the board.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        if self._hashedFood is not self.food:
+            self._rehashBoard()
+        if self._agentHashes == None or len(self._agentHashes) != len(self.agentStates):
+            self._agentHashes = [self._agentHash(i)
+                                 for i in range(len(self.agentStates))]
+        h = self._boardHash
+        for agentHash in self._agentHashes:
+            h ^= agentHash
+        return hash((h, self.score))
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -518,7 +827,7 @@ class GameStateData:
         """
         Creates an initial game state from a layout array (see layout.py).
         """
-        self.food = layout.food.copy()
+        self.food = layout.food.toBitGrid()
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -536,6 +845,9 @@ class GameStateData:
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agentStates]
+        self._sharedAgents = [False for a in self.agentStates]
+        self._rehashBoard()
+        self._agentHashes = None
 
 
 try:
@@ -550,7 +862,7 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False):
+    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, copyObservations=False, turbo=False, profile=None):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -559,6 +871,9 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.copyObservations = copyObservations
+        self.turbo = turbo
+        self.profile = profile
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -580,6 +895,15 @@ class Game:
         self.agentCrashed = True
         self.rules.agentCrash(self, agentIndex)
 
+    def _observation(self):
+        """
+        Returns what an agent is shown of the current state: a read-only view
+        of it, or a full copy if the game was made with copyObservations.
+        """
+        if self.copyObservations:
+            return self.state.deepCopy()
+        return self.state.view()
+
     OLD_STDOUT = None
     OLD_STDERR = None
 
@@ -603,49 +927,25 @@ class Game:
 
     def run(self):
         """
-        Main control loop for game play.
+        Main control loop for game play.  All of the game's time limits are
+        enforced through one TimeoutGuard.  A GameProfile given to the game
+        records it while it runs.
         """
+        recording = contextlib.nullcontext()
+        if self.profile != None:
+            recording = self.profile.recording(self)
+        with TimeoutGuard() as self.timeoutGuard, recording:
+            if self.turbo:
+                self._runTurbo()
+            else:
+                self._runGame()
+
+    def _runGame(self):
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
-        # self.display.initialize(self.state.makeObservation(1).data)
-        # inform learning agents of the game start
-        for i in range(len(self.agents)):
-            agent = self.agents[i]
-            if not agent:
-                self.mute(i)
-                # this is a null agent, meaning it failed to load
-                # the other team wins
-                print("Agent %d failed to load" % i, file=sys.stderr)
-                self.unmute()
-                self._agentCrash(i, quiet=True)
-                return
-            if ("registerInitialState" in dir(agent)):
-                self.mute(i)
-                if self.catchExceptions:
-                    try:
-                        timed_func = TimeoutFunction(
-                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
-                        try:
-                            start_time = time.time()
-                            timed_func(self.state.deepCopy())
-                            time_taken = time.time() - start_time
-                            self.totalAgentTimes[i] += time_taken
-                        except TimeoutFunctionException:
-                            print("Agent %d ran out of time on startup!" %
-                                  i, file=sys.stderr)
-                            self.unmute()
-                            self.agentTimeout = True
-                            self._agentCrash(i, quiet=True)
-                            return
-                    except Exception as data:
-                        self._agentCrash(i, quiet=False)
-                        self.unmute()
-                        return
-                else:
-                    agent.registerInitialState(self.state.deepCopy())
-                # TODO: could this exceed the total time
-                self.unmute()
+        if not self._registerAgents():
+            return
 
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
@@ -660,14 +960,13 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(
-                            self.rules.getMoveTimeout(agentIndex)))
                         try:
-                            start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            start_time = time.perf_counter()
+                            observation = self.timeoutGuard.call(self.rules.getMoveTimeout(agentIndex),
+                                                                 agent.observationFunction, self._observation())
                         except TimeoutFunctionException:
                             skip_action = True
-                        move_time += time.time() - start_time
+                        move_time += time.perf_counter() - start_time
                         self.unmute()
                     except Exception as data:
                         self._agentCrash(agentIndex, quiet=False)
@@ -675,23 +974,22 @@ class Game:
                         return
                 else:
                     observation = agent.observationFunction(
-                        self.state.deepCopy())
+                        self._observation())
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observation()
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(
-                        self.rules.getMoveTimeout(agentIndex)) - int(move_time))
                     try:
-                        start_time = time.time()
+                        start_time = time.perf_counter()
                         if skip_action:
                             raise TimeoutFunctionException()
-                        action = timed_func(observation)
+                        action = self.timeoutGuard.call(self.rules.getMoveTimeout(agentIndex) - move_time,
+                                                        agent.getAction, observation)
                     except TimeoutFunctionException:
                         print("Agent %d timed out on a single move!" %
                               agentIndex, file=sys.stderr)
@@ -700,7 +998,7 @@ class Game:
                         self.unmute()
                         return
 
-                    move_time += time.time() - start_time
+                    move_time += time.perf_counter() - start_time
 
                     if move_time > self.rules.getMoveWarningTime(agentIndex):
                         self.totalAgentTimeWarnings[agentIndex] += 1
@@ -762,6 +1060,145 @@ class Game:
             if _BOINC_ENABLED:
                 boinc.set_fraction_done(self.getProgress())
 
+        self._finishGame()
+
+    def _runTurbo(self):
+        """
+        Headless main loop for training runs and tournaments.  Agent methods
+        are looked up once, the display only sees the first and last states,
+        and each move's observation and action are timed together as a single
+        call.  As in run, an agent's output goes to its buffer only while it
+        moves, so timeout and crash reports still reach the console.
+        """
+        self.display.initialize(self.state.data)
+        self.numMoves = 0
+
+        if not self._registerAgents():
+            return
+
+        observers = [getattr(agent, 'observationFunction', None)
+                     for agent in self.agents]
+        actors = [agent.getAction for agent in self.agents]
+        agentIndex = self.startingIndex
+        numAgents = len(self.agents)
+
+        try:
+            while not self.gameOver:
+                if self.catchExceptions:
+                    try:
+                        start_time = time.perf_counter()
+                        action = self.timeoutGuard.call(self.rules.getMoveTimeout(agentIndex), self._turboMove,
+                                                        agentIndex, observers[agentIndex], actors[agentIndex])
+                        move_time = time.perf_counter() - start_time
+                    except TimeoutFunctionException:
+                        print("Agent %d timed out on a single move!" %
+                              agentIndex, file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+                    except Exception as data:
+                        self._agentCrash(agentIndex)
+                        return
+
+                    if move_time > self.rules.getMoveWarningTime(agentIndex):
+                        self.totalAgentTimeWarnings[agentIndex] += 1
+                        print("Agent %d took too long to make a move! This is warning %d" % (
+                            agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                        if self.totalAgentTimeWarnings[agentIndex] > self.rules.getMaxTimeWarnings(agentIndex):
+                            print("Agent %d exceeded the maximum number of warnings: %d" % (
+                                agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                            self.agentTimeout = True
+                            self._agentCrash(agentIndex, quiet=True)
+                            return
+
+                    self.totalAgentTimes[agentIndex] += move_time
+                    if self.totalAgentTimes[agentIndex] > self.rules.getMaxTotalTime(agentIndex):
+                        print("Agent %d ran out of time! (time: %1.2f)" % (
+                            agentIndex, self.totalAgentTimes[agentIndex]), file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+
+                    self.moveHistory.append((agentIndex, action))
+                    try:
+                        self.state = self.state.generateSuccessor(
+                            agentIndex, action)
+                    except Exception as data:
+                        self._agentCrash(agentIndex)
+                        return
+                else:
+                    action = self._turboMove(
+                        agentIndex, observers[agentIndex], actors[agentIndex])
+                    self.moveHistory.append((agentIndex, action))
+                    self.state = self.state.generateSuccessor(
+                        agentIndex, action)
+
+                self.rules.process(self.state, self)
+                agentIndex = (agentIndex + 1) % numAgents
+        finally:
+            # A timeout can interrupt _turboMove before it unmutes
+            self.unmute()
+
+        self.display.update(self.state.data)
+        self._finishGame()
+
+    def _turboMove(self, agentIndex, observe, act):
+        self.mute(agentIndex)
+        try:
+            if observe == None:
+                return act(self._observation())
+            return act(observe(self._observation()))
+        finally:
+            self.unmute()
+
+    def _registerAgents(self):
+        """
+        Hands every agent the initial state.  Returns False if one of them
+        failed, which ends the game.
+        """
+        # self.display.initialize(self.state.makeObservation(1).data)
+        # inform learning agents of the game start
+        for i in range(len(self.agents)):
+            agent = self.agents[i]
+            if not agent:
+                self.mute(i)
+                # this is a null agent, meaning it failed to load
+                # the other team wins
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self.unmute()
+                self._agentCrash(i, quiet=True)
+                return False
+            if ("registerInitialState" in dir(agent)):
+                self.mute(i)
+                if self.catchExceptions:
+                    try:
+                        try:
+                            start_time = time.perf_counter()
+                            self.timeoutGuard.call(self.rules.getMaxStartupTime(i),
+                                                   agent.registerInitialState, self.state.deepCopy())
+                            time_taken = time.perf_counter() - start_time
+                            self.totalAgentTimes[i] += time_taken
+                        except TimeoutFunctionException:
+                            print("Agent %d ran out of time on startup!" %
+                                  i, file=sys.stderr)
+                            self.unmute()
+                            self.agentTimeout = True
+                            self._agentCrash(i, quiet=True)
+                            return False
+                    except Exception as data:
+                        self._agentCrash(i, quiet=False)
+                        self.unmute()
+                        return False
+                else:
+                    agent.registerInitialState(self.state.deepCopy())
+                # TODO: could this exceed the total time
+                self.unmute()
+        return True
+
+    def _finishGame(self):
+        """
+        Informs learning agents of the game result and closes the display.
+        """
         # inform a learning agent of the game result
         for agentIndex, agent in enumerate(self.agents):
             if "final" in dir(agent):
@@ -776,3 +1213,175 @@ class Game:
                     self.unmute()
                     return
         self.display.finish()
+
+
+class GameProfile:
+    """
+    Records where the time of one game goes, for a Game made with it.
+
+    Each agent's registerInitialState, observationFunction and getAction
+    calls are timed, along with every generateSuccessor and doMove call and
+    the game rules' process call made during that agent's turn.  The display
+    has its own timings.  generateSuccessor, doMove, deepCopy and view calls
+    on the game's state class are counted wherever they come from, including
+    the agents' own searches, which step with doMove and undoMove where the
+    state class has them.  Because successor time is recorded inside
+    getAction as well, the phases overlap.  The methods are swapped for
+    timed ones while the game runs, so profile one game at a time in a
+    process.  With a statsFile, cProfile also runs for the whole game and
+    its stats are dumped there for pstats.
+    """
+    AGENT_PHASES = ['registerInitialState', 'observationFunction',
+                    'getAction', 'generateSuccessor', 'doMove', 'process']
+    COUNTED = ['generateSuccessor', 'doMove', 'deepCopy', 'view']
+
+    def __init__(self, statsFile=None):
+        self.statsFile = statsFile
+        self.agentIndex = 0
+        self.agentPhases = []
+        self.display = [0, 0.0, 0.0]
+        self.counts = dict((name, 0) for name in self.COUNTED)
+        self.seconds = 0.0
+        self.moves = 0
+
+    @contextlib.contextmanager
+    def recording(self, game):
+        """
+        Profiles game while the body of the with statement runs.
+        """
+        self.agentPhases = [dict((phase, [0, 0.0, 0.0]) for phase in self.AGENT_PHASES)
+                            for agent in game.agents]
+        patches = []
+        for index, agent in enumerate(game.agents):
+            if not agent:
+                continue
+            for phase in ['registerInitialState', 'observationFunction', 'getAction']:
+                if hasattr(agent, phase):
+                    patches.append(self._patch(agent, phase,
+                                               self._agentTimer(index, phase, getattr(agent, phase))))
+        patches.append(self._patch(game.rules, 'process',
+                                   self._turnTimer('process', game.rules.process)))
+        for name in ['initialize', 'update', 'finish']:
+            if hasattr(game.display, name):
+                patches.append(self._patch(game.display, name,
+                                           self._displayTimer(getattr(game.display, name))))
+        stateClass = type(game.state)
+        for name in self.COUNTED:
+            if name in stateClass.__dict__:
+                patches.append(self._patch(stateClass, name,
+                                           self._counter(name, stateClass.__dict__[name])))
+
+        profiler = None
+        if self.statsFile != None:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            if profiler != None:
+                profiler.disable()
+                profiler.dump_stats(self.statsFile)
+            for target, name, hadOwn, old in reversed(patches):
+                if hadOwn:
+                    setattr(target, name, old)
+                else:
+                    delattr(target, name)
+            self.moves += len(game.moveHistory)
+
+    def _patch(self, target, name, replacement):
+        hadOwn = name in target.__dict__
+        old = target.__dict__.get(name)
+        setattr(target, name, replacement)
+        return (target, name, hadOwn, old)
+
+    def _record(self, times, seconds):
+        times[0] += 1
+        times[1] += seconds
+        if seconds > times[2]:
+            times[2] = seconds
+
+    def _agentTimer(self, index, phase, function):
+        def timed(*args, **keyArgs):
+            self.agentIndex = index
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.agentPhases[index][phase],
+                             time.perf_counter() - start)
+        return timed
+
+    def _turnTimer(self, phase, function):
+        def timed(*args, **keyArgs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.agentPhases[self.agentIndex][phase],
+                             time.perf_counter() - start)
+        return timed
+
+    def _displayTimer(self, function):
+        def timed(*args, **keyArgs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.display, time.perf_counter() - start)
+        return timed
+
+    def _counter(self, name, function):
+        if name in ['generateSuccessor', 'doMove']:
+            function = self._turnTimer(name, function)
+
+        def counted(*args, **keyArgs):
+            self.counts[name] += 1
+            return function(*args, **keyArgs)
+        return counted
+
+    def summary(self):
+        """
+        Returns the recorded times and counts as a dictionary of plain values
+        that json can write.  Each timing is {'calls', 'seconds', 'max'}.
+        """
+        def timing(times):
+            return {'calls': times[0], 'seconds': round(times[1], 6), 'max': round(times[2], 6)}
+        summary = {'seconds': round(self.seconds, 6), 'moves': self.moves,
+                   'counts': dict(self.counts),
+                   'display': timing(self.display),
+                   'agents': [dict((phase, timing(phases[phase])) for phase in self.AGENT_PHASES)
+                              for phases in self.agentPhases]}
+        if self.statsFile != None:
+            summary['statsFile'] = self.statsFile
+        return summary
+
+    @staticmethod
+    def combine(summaries):
+        """
+        Adds up game summaries (of games with the same number of agents) into
+        one for the whole run.
+        """
+        def add(total, timing):
+            total['calls'] += timing['calls']
+            total['seconds'] = round(total['seconds'] + timing['seconds'], 6)
+            total['max'] = max(total['max'], timing['max'])
+        total = {'games': 0, 'seconds': 0.0, 'moves': 0,
+                 'counts': dict((name, 0) for name in GameProfile.COUNTED),
+                 'display': {'calls': 0, 'seconds': 0.0, 'max': 0.0}, 'agents': []}
+        for summary in summaries:
+            total['games'] += 1
+            total['seconds'] = round(total['seconds'] + summary['seconds'], 6)
+            total['moves'] += summary['moves']
+            for name in GameProfile.COUNTED:
+                total['counts'][name] += summary['counts'][name]
+            add(total['display'], summary['display'])
+            for index, phases in enumerate(summary['agents']):
+                if index == len(total['agents']):
+                    total['agents'].append(dict((phase, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+                                                for phase in GameProfile.AGENT_PHASES))
+                for phase in GameProfile.AGENT_PHASES:
+                    add(total['agents'][index][phase], phases[phase])
+        return total
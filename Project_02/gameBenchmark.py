@@ -0,0 +1,81 @@
+# gameBenchmark.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Measures game loop throughput in moves per second: the same seeded games
+are played headless with the regular game loop and with the turbo one, time
+limits enforced in both, and must end the same way.
+
+  python gameBenchmark.py -l mediumClassic -n 20 -s 1
+"""
+import random
+import time
+import layout
+import pacman
+import textDisplay
+
+
+def playGames(lay, pacmanAgent, ghostAgents, numGames, seed, turbo):
+    random.seed(seed)
+    rules = pacman.ClassicGameRules()
+    rules.quiet = True
+    results = []
+    moves = 0
+    start = time.perf_counter()
+    for i in range(numGames):
+        game = rules.newGame(lay, pacmanAgent, ghostAgents, textDisplay.NullGraphics(),
+                             True, catchExceptions=True, turbo=turbo)
+        game.run()
+        moves += len(game.moveHistory)
+        results.append((game.state.getScore(), tuple(game.moveHistory)))
+    return results, moves, time.perf_counter() - start
+
+
+def runBenchmark(layoutName, pacmanName, ghostName, numGames, seed):
+    lay = layout.getLayout(layoutName)
+    if lay == None:
+        raise Exception("The layout " + layoutName + " cannot be found")
+    pacmanAgent = pacman.loadAgent(pacmanName, True)()
+    ghostType = pacman.loadAgent(ghostName, True)
+    ghostAgents = [ghostType(i + 1) for i in range(lay.getNumGhosts())]
+
+    outcomes = {}
+    for name, turbo in [('regular', False), ('turbo', True)]:
+        results, moves, elapsed = playGames(lay, pacmanAgent, ghostAgents, numGames, seed, turbo)
+        outcomes[name] = results
+        print('%-8s games %4d  moves %8d  %6.2fs  %9.0f moves/s' %
+              (name, numGames, moves, elapsed, moves / elapsed))
+
+    if outcomes['regular'] != outcomes['turbo']:
+        raise Exception('The regular and turbo game loops played different games')
+    return outcomes
+
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python gameBenchmark.py <options>')
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='the layout to play on [Default: %default]')
+    parser.add_option('-p', '--pacman', dest='pacman', default='GreedyAgent',
+                      help='the pacman agent type [Default: %default]')
+    parser.add_option('-g', '--ghosts', dest='ghost', default='RandomGhost',
+                      help='the ghost agent type [Default: %default]')
+    parser.add_option('-n', '--numGames', dest='numGames', type='int', default=20,
+                      help='the number of games to play with each loop [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=1,
+                      help='the random seed both loops start from [Default: %default]')
+    options, otherjunk = parser.parse_args()
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    runBenchmark(options.layout, options.pacman, options.ghost, options.numGames, options.seed)
@@ -177,8 +177,9 @@ class MinimaxAgent(MultiAgentSearchAgent):
             move = None
             # Choose the action that results in the best utility(Take the max of the minimums)
             for action in gameState.getLegalActions(agentIndex):
-                current_value, current_move = minValue((agentIndex + 1) % num_of_agents,
-                                                       gameState.generateSuccessor(agentIndex, action), depth)
+                token = gameState.doMove(agentIndex, action)
+                current_value, current_move = minValue((agentIndex + 1) % num_of_agents, gameState, depth)
+                gameState.undoMove(token)
 
                 # Take the action that results in the maximum utility
                 if current_value > value:
@@ -192,15 +193,15 @@ class MinimaxAgent(MultiAgentSearchAgent):
             value = sys.maxsize
             move = None
             for action in gameState.getLegalActions(agentIndex):
+                token = gameState.doMove(agentIndex, action)
                 # if it's not the last ghost's turn, don't update depth
                 if agentIndex != num_of_agents - 1:
-                    current_value, current_move = minValue((agentIndex + 1) % num_of_agents,
-                                                           gameState.generateSuccessor(agentIndex, action), depth)
+                    current_value, current_move = minValue((agentIndex + 1) % num_of_agents, gameState, depth)
 
                 # update depth since it's Pacman's turn to move
                 else:
-                    current_value, current_move = maxValue((agentIndex + 1) % num_of_agents,
-                                                           gameState.generateSuccessor(agentIndex, action), depth - 1)
+                    current_value, current_move = maxValue((agentIndex + 1) % num_of_agents, gameState, depth - 1)
+                gameState.undoMove(token)
 
                 # Take the action that results in the least utility
                 if current_value < value:
@@ -236,8 +237,9 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
             v = -sys.maxsize - 1
             legal_acts = gstate.getLegalActions(agentIndex)
             for a in legal_acts:
-                v = max(v, minValue((agentIndex + 1) % num_of_agents, gstate.generateSuccessor(agentIndex, a), depth,
-                                    alpha, beta))
+                token = gstate.doMove(agentIndex, a)
+                v = max(v, minValue((agentIndex + 1) % num_of_agents, gstate, depth, alpha, beta))
+                gstate.undoMove(token)
                 # only record to our list if we are at the first level (before we have modified depth).
                 if depth == self.depth: firstLevelList.append((v, a))
 
@@ -254,13 +256,12 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
             v = sys.maxsize - 1
             legal_acts = gstate.getLegalActions(agentIndex)
             for a in legal_acts:
+                token = gstate.doMove(agentIndex, a)
                 if agentIndex != num_of_agents - 1:
-                    v = min(v,
-                            minValue((agentIndex + 1) % num_of_agents, gstate.generateSuccessor(agentIndex, a), depth,
-                                     alpha, beta))
+                    v = min(v, minValue((agentIndex + 1) % num_of_agents, gstate, depth, alpha, beta))
                 else:
-                    v = min(v, maxValue((agentIndex + 1) % num_of_agents, gstate.generateSuccessor(agentIndex, a),
-                                        depth - 1, alpha, beta))
+                    v = min(v, maxValue((agentIndex + 1) % num_of_agents, gstate, depth - 1, alpha, beta))
+                gstate.undoMove(token)
                 if v < alpha:
                     return v
                 beta = min(beta, v)
@@ -302,8 +303,9 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             move = None
             # Choose the action that results in the best utility(Take the max of the minimums)
             for action in gameState.getLegalActions(agentIndex):
-                current_value, current_move = expectedScore((agentIndex + 1) % num_of_agents,
-                                                            gameState.generateSuccessor(agentIndex, action), depth)
+                token = gameState.doMove(agentIndex, action)
+                current_value, current_move = expectedScore((agentIndex + 1) % num_of_agents, gameState, depth)
+                gameState.undoMove(token)
 
                 # Take the action that results in the maximum utility
                 if current_value > value:
@@ -320,16 +322,16 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             sum_scores = 0
 
             for action in legal_actions:
+                token = gameState.doMove(agentIndex, action)
                 if agentIndex != num_of_agents - 1:
-                    current_value, current_move = expectedScore((agentIndex + 1) % num_of_agents,
-                                                                gameState.generateSuccessor(agentIndex, action), depth)
+                    current_value, current_move = expectedScore((agentIndex + 1) % num_of_agents, gameState, depth)
                     sum_scores += current_value
 
                 # update depth since it's Pacman's turn to move
                 else:
-                    current_value, current_move = maxValue((agentIndex + 1) % num_of_agents,
-                                                           gameState.generateSuccessor(agentIndex, action), depth - 1)
+                    current_value, current_move = maxValue((agentIndex + 1) % num_of_agents, gameState, depth - 1)
                     sum_scores += current_value
+                gameState.undoMove(token)
 
             # Calculate the average score and select a random action
             avg_score = sum_scores / len(legal_actions)
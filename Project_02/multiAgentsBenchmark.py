@@ -0,0 +1,100 @@
+# multiAgentsBenchmark.py
+# -----------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Measures adversarial search node throughput: the same full minimax tree is
+walked once by allocating a successor per node (generateSuccessor) and once
+on a single state with doMove/undoMove.
+
+  python multiAgentsBenchmark.py -l mediumClassic -d 3
+"""
+import time
+import layout
+from pacman import GameState
+
+
+def minimaxSuccessors(state, agentIndex, depth, counter):
+    counter[0] += 1
+    if depth == 0 or state.isWin() or state.isLose():
+        return state.getScore()
+    numAgents = state.getNumAgents()
+    nextAgent = (agentIndex + 1) % numAgents
+    nextDepth = depth - 1 if nextAgent == 0 else depth
+    values = [minimaxSuccessors(state.generateSuccessor(agentIndex, action), nextAgent, nextDepth, counter)
+              for action in state.getLegalActions(agentIndex)]
+    if agentIndex == 0:
+        return max(values)
+    return min(values)
+
+
+def minimaxInPlace(state, agentIndex, depth, counter):
+    counter[0] += 1
+    if depth == 0 or state.isWin() or state.isLose():
+        return state.getScore()
+    numAgents = state.getNumAgents()
+    nextAgent = (agentIndex + 1) % numAgents
+    nextDepth = depth - 1 if nextAgent == 0 else depth
+    values = []
+    for action in state.getLegalActions(agentIndex):
+        token = state.doMove(agentIndex, action)
+        values.append(minimaxInPlace(state, nextAgent, nextDepth, counter))
+        state.undoMove(token)
+    if agentIndex == 0:
+        return max(values)
+    return min(values)
+
+
+def runBenchmark(layoutName, depth, numGhosts, trackExplored=False):
+    lay = layout.getLayout(layoutName)
+    if lay == None:
+        raise Exception("The layout " + layoutName + " cannot be found")
+    state = GameState()
+    state.initialize(lay, numGhosts)
+
+    results = {}
+    for name, search in [('generateSuccessor', minimaxSuccessors), ('doMove/undoMove', minimaxInPlace)]:
+        counter = [0]
+        start = time.time()
+        if trackExplored:
+            with GameState.trackExplored() as explored:
+                value = search(state, 0, depth, counter)
+            explored = len(explored)
+        else:
+            value = search(state, 0, depth, counter)
+            explored = 0
+        elapsed = time.time() - start
+        results[name] = (value, counter[0], explored)
+        print('%-18s value %8.1f  nodes %8d  explored %8d  %6.2fs  %9.0f nodes/s' %
+              (name, value, counter[0], explored, elapsed, counter[0] / elapsed))
+
+    if len(set(results.values())) != 1:
+        raise Exception('doMove/undoMove and generateSuccessor disagree: %s' % results)
+    return results
+
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python multiAgentsBenchmark.py <options>')
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='the layout to search from [Default: %default]')
+    parser.add_option('-d', '--depth', dest='depth', type='int', default=3,
+                      help='the search depth in plies of all agents [Default: %default]')
+    parser.add_option('-k', '--numghosts', dest='numGhosts', type='int', default=2,
+                      help='the maximum number of ghosts [Default: %default]')
+    parser.add_option('-e', '--explored', action='store_true', dest='trackExplored', default=False,
+                      help='also count explored states, as the autograder does')
+    options, otherjunk = parser.parse_args()
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    runBenchmark(options.layout, options.depth, options.numGhosts, options.trackExplored)
@@ -56,6 +56,14 @@ class MultiagentTreeState(object):
         self.problem.generatedStates.add(successor)
         return MultiagentTreeState(self.problem, successor)
 
+    def doMove(self, agentIndex, action):
+        previous = self.state
+        self.state = self.generateSuccessor(agentIndex, action).state
+        return previous
+
+    def undoMove(self, token):
+        self.state = token
+
     def getScore(self):
         if VERBOSE:
             print("getScore(%s) -> %s" %
@@ -148,7 +156,8 @@ def run(lay, layName, pac, ghosts, disp, nGames=1, name='games'):
     starttime = time.time()
     print('*** Running %s on' % name, layName, '%d time(s).' % nGames)
     games = pacman.runGames(lay, pac, ghosts, disp,
-                            nGames, False, catchExceptions=True, timeout=120)
+                            nGames, False, catchExceptions=True, timeout=120,
+                            trackExplored=True)
     print('*** Finished running %s on' % name, layName,
           'after %d seconds.' % (time.time() - starttime))
     stats = {'time': time.time() - starttime, 'wins': [g.state.isWin() for g in games].count(True), 'games': games, 'scores': [g.state.getScore() for g in games],
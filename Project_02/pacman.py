@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import GameProfile
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -52,6 +53,7 @@ import types
 import time
 import random
 import os
+import contextlib
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -77,15 +79,39 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of which states have been generated.  It is
+    # None unless explored-state tracking is on (see trackExplored), so normal
+    # games neither pay for hashing every successor nor grow an unbounded set.
+    # Any counter with add, copy and clear can stand in for the default set.
+    explored = None
 
     def getAndResetExplored():
+        if GameState.explored is None:
+            return set()
         tmp = GameState.explored.copy()
-        GameState.explored = set()
+        GameState.explored.clear()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def trackExplored(counter=None):
+        """
+        Records generated states in counter (a new set by default) for the
+        duration of a with block, restoring the previous setting afterwards:
+
+          with GameState.trackExplored() as explored:
+              agent.getAction(state)
+          print(len(explored))
+        """
+        previous = GameState.explored
+        if counter is None:
+            counter = set()
+        GameState.explored = counter
+        try:
+            yield counter
+        finally:
+            GameState.explored = previous
+    trackExplored = staticmethod(contextlib.contextmanager(trackExplored))
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -107,31 +133,71 @@ class GameState:
         if self.isWin() or self.isLose():
             raise Exception('Can\'t generate a successor of a terminal state.')
 
-        # Copy current state
+        # Copy current state; unchanged parts are shared with this one
         state = GameState(self)
+        state._applyMove(agentIndex, action)
+        if GameState.explored is not None:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
+        return state
+
+    def doMove(self, agentIndex, action):
+        """
+        Makes the move in place: afterwards this state is exactly what
+        generateSuccessor(agentIndex, action) would have returned (score,
+        scared timers, win/lose flags and _eaten included).  Returns a token
+        for undoMove.
+
+        Search code can walk a whole game tree on one state this way instead
+        of allocating a successor per node.  Moves must be undone in reverse
+        order, and the state must not be kept (e.g. in a set) across moves.
+        """
+        if self.isWin() or self.isLose():
+            raise Exception('Can\'t generate a successor of a terminal state.')
+
+        # Explored states are recorded by value, as generateSuccessor does.
+        # Every state but the first one a search moves from was recorded when
+        # it was reached, so only that one needs recording here.
+        explored = GameState.explored
+        if explored is not None and self._movesMade == 0:
+            explored.add(GameState(self))
+        token = (self.data.checkpoint(), self._movesMade)
+        self.data._resetMoveInfo()
+        self._applyMove(agentIndex, action)
+        self._movesMade += 1
+        if explored is not None:
+            explored.add(GameState(self))
+        return token
+
+    def undoMove(self, token):
+        """
+        Takes back the move that doMove returned the token for.
+        """
+        checkpoint, self._movesMade = token
+        self.data.restore(checkpoint)
 
+    def _applyMove(self, agentIndex, action):
         # Let agent's logic deal with its action's effects on the board
         if agentIndex == 0:  # Pacman is moving
-            state.data._eaten = [False for i in range(state.getNumAgents())]
-            PacmanRules.applyAction(state, action)
+            self.data._eaten = [False for i in range(self.getNumAgents())]
+            PacmanRules.applyAction(self, action)
         else:                # A ghost is moving
-            GhostRules.applyAction(state, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex)
 
         # Time passes
         if agentIndex == 0:
-            state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
+            self.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(
+                self.data.getMutableAgentState(agentIndex))
+            self.data.updateAgentHash(agentIndex)
 
         # Resolve multi-agent effects
-        GhostRules.checkDeath(state, agentIndex)
+        GhostRules.checkDeath(self, agentIndex)
 
         # Book keeping
-        state.data._agentMoved = agentIndex
-        state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
-        return state
+        self.data._agentMoved = agentIndex
+        self.data.score += self.data.scoreChange
 
     def getLegalPacmanActions(self):
         return self.getLegalActions(0)
@@ -234,6 +300,16 @@ class GameState:
             self.data = GameStateData(prevState.data)
         else:
             self.data = GameStateData()
+        self._movesMade = 0
+
+    def view(self):
+        """
+        Returns a view of this state for an agent; writing to it leaves this
+        state unchanged (see GameStateData.view).
+        """
+        state = GameState()
+        state.data = self.data.view()
+        return state
 
     def deepCopy(self):
         state = GameState(self)
@@ -280,14 +356,25 @@ class ClassicGameRules:
     and how the game starts and ends.
     """
 
-    def __init__(self, timeout=30):
+    def __init__(self, timeout=30, trackExplored=False):
         self.timeout = timeout
+        self.trackExplored = trackExplored
+
+    def exploredTracking(self):
+        """
+        Context to run a game in: records explored states in a fresh
+        GameState.explored if this rule set tracks them, otherwise does nothing.
+        """
+        if self.trackExplored:
+            return GameState.trackExplored()
+        return contextlib.nullcontext()
 
-    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
+    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False, turbo=False, profile=None):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, display, self,
+                    catchExceptions=catchExceptions, turbo=turbo, profile=profile)
         game.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
@@ -359,12 +446,13 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getMutableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
         pacmanState.configuration = pacmanState.configuration.generateSuccessor(
             vector)
+        state.data.updateAgentHash(0)
 
         # Eat
         next = pacmanState.configuration.getPosition()
@@ -381,6 +469,7 @@ class PacmanRules:
             state.data.scoreChange += 10
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
+            state.data.updateFoodHash(position)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -389,11 +478,15 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.capsules = [
+                c for c in state.data.capsules if c != position]
+            state.data.updateCapsuleHash(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getMutableAgentState(
+                    index).scaredTimer = SCARED_TIME
+                state.data.updateAgentHash(index)
     consume = staticmethod(consume)
 
 
@@ -425,13 +518,14 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
         vector = Actions.directionToVector(action, speed)
         ghostState.configuration = ghostState.configuration.generateSuccessor(
             vector)
+        state.data.updateAgentHash(ghostIndex)
     applyAction = staticmethod(applyAction)
 
     def decrementTimer(ghostState):
@@ -460,9 +554,12 @@ class GhostRules:
     def collide(state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.getMutableAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
+            state.data.updateAgentHash(agentIndex)
             # Added for first-person
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -554,6 +651,12 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--workers', dest='workers', type='int',
+                      help=default('Number of processes to play games in; games after the training ones are played in parallel, without graphics'), default=1)
+    parser.add_option('--profile', dest='profile',
+                      help='Writes a JSON summary of where the time of each game went to this file', default=None)
+    parser.add_option('--pstats', dest='pstats',
+                      help='With --profile, also runs cProfile and writes each game\'s stats to this directory', default=None)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -606,6 +709,10 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['workers'] = options.workers
+    args['seedGames'] = options.fixRandomSeed
+    args['profile'] = options.profile
+    args['pstats'] = options.pstats
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -672,14 +779,30 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30, trackExplored=False, workers=1, profile=None, pstats=None, seedGames=False):
     import __main__
     __main__.__dict__['_display'] = display
 
-    rules = ClassicGameRules(timeout)
+    rules = ClassicGameRules(timeout, trackExplored)
     games = []
-
-    for i in range(numGames):
+    profiles = {}
+
+    # With several workers only the training games, which the agents may
+    # learn from in order, are played here
+    numSerialGames = numGames
+    if workers > 1:
+        numSerialGames = min(numTraining, numGames)
+
+    # With seedGames, game number i is played after seeding random with
+    # baseSeed + i wherever it is played, so -f gives the same games for any
+    # number of workers.  Otherwise the games played here carry on with
+    # random as it is.
+    baseSeed = None
+    if seedGames:
+        baseSeed = random.randrange(2 ** 31)
+    for i in range(numSerialGames):
+        if baseSeed != None:
+            random.seed(baseSeed + i)
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
@@ -689,21 +812,33 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
         else:
             gameDisplay = display
             rules.quiet = False
+        # Training games are headless, so they take the turbo game loop
+        gameProfile = None
+        if profile != None:
+            gameProfile = makeGameProfile(pstats, i)
         game = rules.newGame(layout, pacman, ghosts,
-                             gameDisplay, beQuiet, catchExceptions)
-        game.run()
+                             gameDisplay, beQuiet, catchExceptions, turbo=beQuiet, profile=gameProfile)
+        with rules.exploredTracking():
+            game.run()
         if not beQuiet:
             games.append(game)
+        if gameProfile != None:
+            profiles[i] = gameProfile.summary()
 
         if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+            recordGame(layout, game, i)
+
+    if numSerialGames < numGames:
+        rules.quiet = False
+        if baseSeed == None:
+            baseSeed = random.randrange(2 ** 31)
+        for i, game in runParallelGames(layout, pacman, ghosts, range(numSerialGames, numGames), baseSeed,
+                                        workers, rules, catchExceptions, profile != None, pstats):
+            games.append(game)
+            if game.profileSummary != None:
+                profiles[i] = game.profileSummary
+            if record:
+                recordGame(layout, game, i)
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
@@ -716,9 +851,118 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
         print('Record:       ', ', '.join(
             [['Loss', 'Win'][int(w)] for w in wins]))
 
+    if profile != None:
+        writeProfile(profile, profiles)
+
     return games
 
 
+def makeGameProfile(pstats, i):
+    """
+    Returns the GameProfile for game number i, which dumps cProfile stats
+    into the directory pstats if that is given.
+    """
+    if pstats == None:
+        return GameProfile()
+    if not os.path.isdir(pstats):
+        os.makedirs(pstats)
+    return GameProfile(os.path.join(pstats, 'game-%d.pstats' % (i + 1)))
+
+
+def writeProfile(fileName, profiles):
+    """
+    Writes the GameProfile summaries of a run, by game number, to fileName
+    as JSON, along with their total.
+    """
+    import json
+    numbers = sorted(profiles)
+    report = {'games': [dict(game=i + 1, **profiles[i]) for i in numbers],
+              'total': GameProfile.combine([profiles[i] for i in numbers])}
+    with open(fileName, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Wrote the profile of %d games to %s' % (len(numbers), fileName))
+
+
+def recordGame(layout, game, i):
+    import time
+    import pickle
+    fname = ('recorded-game-%d' % (i + 1)) + \
+        '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = open(fname, 'wb')
+    components = {'layout': layout, 'actions': game.moveHistory}
+    pickle.dump(components, f)
+    f.close()
+
+
+class FinishedGame:
+    """
+    What a worker process sends back for a game it played: the final
+    state and move history, and whether an agent crashed or timed out.
+    It stands in for the Game in the list runGames returns.
+    """
+
+    def __init__(self, game):
+        self.state = game.state
+        self.moveHistory = game.moveHistory
+        self.agentCrashed = game.agentCrashed
+        self.agentTimeout = game.agentTimeout
+        self.gameOver = False
+        self.profileSummary = None
+        if game.profile != None:
+            self.profileSummary = game.profile.summary()
+
+
+def runParallelGames(layout, pacman, ghosts, gameNumbers, baseSeed, workers, rules, catchExceptions=False, profiling=False, pstats=None):
+    """
+    Plays the games numbered gameNumbers in a pool of worker processes and
+    returns (game number, FinishedGame) pairs in game order, reporting each
+    result as it comes in.
+
+    Every worker plays with its own copy of the agents and no graphics.
+    Game number i is played after seeding random with baseSeed + i, as
+    runGames does for the games it plays itself with seedGames, so -f makes
+    the whole run repeatable however the games are spread over the workers.  Explored
+    states are tracked in the workers if rules tracks them.  With
+    profiling, each worker profiles its games and the summaries come back
+    with them.
+    """
+    import concurrent.futures
+    finished = {}
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=initGameWorker,
+                                                initargs=(layout, pacman, ghosts, rules.timeout, rules.trackExplored,
+                                                          catchExceptions, profiling, pstats)) as pool:
+        futures = dict((pool.submit(playWorkerGame, baseSeed + i, i), i) for i in gameNumbers)
+        for future in concurrent.futures.as_completed(futures):
+            game = future.result()
+            rules.process(game.state, game)
+            finished[futures[future]] = game
+    return sorted(finished.items())
+
+
+# The game components of a worker process, set by initGameWorker
+workerGameArgs = None
+
+
+def initGameWorker(layout, pacman, ghosts, timeout, trackExplored, catchExceptions, profiling, pstats):
+    global workerGameArgs
+    workerGameArgs = (layout, pacman, ghosts, timeout, trackExplored, catchExceptions, profiling, pstats)
+
+
+def playWorkerGame(seed, i):
+    import textDisplay
+    layout, pacman, ghosts, timeout, trackExplored, catchExceptions, profiling, pstats = workerGameArgs
+    random.seed(seed)
+    rules = ClassicGameRules(timeout, trackExplored)
+    gameProfile = None
+    if profiling:
+        gameProfile = makeGameProfile(pstats, i)
+    game = rules.newGame(layout, pacman, ghosts,
+                         textDisplay.NullGraphics(), True, catchExceptions, turbo=True, profile=gameProfile)
+    with rules.exploredTracking():
+        game.run()
+    return FinishedGame(game)
+
+
 if __name__ == '__main__':
     """
     The main function called when pacman.py is run
@@ -551,7 +551,7 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, horizon, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False):
+    def __init__(self, agents, horizon, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, turbo=False):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -565,6 +565,7 @@ class Game:
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
         self.horizon = horizon
+        self.turbo = turbo
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -605,49 +606,20 @@ class Game:
 
     def run(self):
         """
-        Main control loop for game play.
+        Main control loop for game play.  Games made with turbo=True are
+        played by the leaner _runTurbo loop instead.
         """
+        if self.turbo:
+            self._runTurbo()
+        else:
+            self._runGame()
+
+    def _runGame(self):
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
-        # self.display.initialize(self.state.makeObservation(1).data)
-        # inform learning agents of the game start
-        for i in range(len(self.agents)):
-            agent = self.agents[i]
-            if not agent:
-                self.mute(i)
-                # this is a null agent, meaning it failed to load
-                # the other team wins
-                print("Agent %d failed to load" % i, file=sys.stderr)
-                self.unmute()
-                self._agentCrash(i, quiet=True)
-                return
-            if ("registerInitialState" in dir(agent)):
-                self.mute(i)
-                if self.catchExceptions:
-                    try:
-                        timed_func = TimeoutFunction(
-                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
-                        try:
-                            start_time = time.time()
-                            timed_func(self.state.deepCopy())
-                            time_taken = time.time() - start_time
-                            self.totalAgentTimes[i] += time_taken
-                        except TimeoutFunctionException:
-                            print("Agent %d ran out of time on startup!" %
-                                  i, file=sys.stderr)
-                            self.unmute()
-                            self.agentTimeout = True
-                            self._agentCrash(i, quiet=True)
-                            return
-                    except Exception as data:
-                        self._agentCrash(i, quiet=False)
-                        self.unmute()
-                        return
-                else:
-                    agent.registerInitialState(self.state.deepCopy())
-                # TODO: could this exceed the total time
-                self.unmute()
+        if not self._registerAgents():
+            return
 
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
@@ -766,6 +738,143 @@ class Game:
             if _BOINC_ENABLED:
                 boinc.set_fraction_done(self.getProgress())
 
+        self._finishGame()
+
+    def _runTurbo(self):
+        """
+        Headless main loop for training runs.  Agent methods are looked up
+        once, the display only sees the first and last states, and each
+        move's observation and action are timed together as a single call.
+        An agent's output goes to its buffer only while it moves, so timeout
+        and crash reports still reach the console.
+        """
+        self.display.initialize(self.state.data)
+        self.numMoves = 0
+
+        if not self._registerAgents():
+            return
+
+        observers = [getattr(agent, 'observationFunction', None)
+                     for agent in self.agents]
+        actors = [agent.getAction for agent in self.agents]
+        agentIndex = self.startingIndex
+        numAgents = len(self.agents)
+        timestep = 0
+
+        while not self.gameOver and (self.horizon < 0 or timestep < self.horizon):
+            timestep += 1
+            if self.catchExceptions:
+                try:
+                    timed_func = TimeoutFunction(self._turboMove, int(
+                        self.rules.getMoveTimeout(agentIndex)))
+                    start_time = time.time()
+                    action = timed_func(agentIndex, observers[agentIndex], actors[agentIndex])
+                    move_time = time.time() - start_time
+                except TimeoutFunctionException:
+                    print("Agent %d timed out on a single move!" %
+                          agentIndex, file=sys.stderr)
+                    self.agentTimeout = True
+                    self._agentCrash(agentIndex, quiet=True)
+                    return
+                except Exception as data:
+                    self._agentCrash(agentIndex)
+                    return
+
+                if move_time > self.rules.getMoveWarningTime(agentIndex):
+                    self.totalAgentTimeWarnings[agentIndex] += 1
+                    print("Agent %d took too long to make a move! This is warning %d" % (
+                        agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                    if self.totalAgentTimeWarnings[agentIndex] > self.rules.getMaxTimeWarnings(agentIndex):
+                        print("Agent %d exceeded the maximum number of warnings: %d" % (
+                            agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+
+                self.totalAgentTimes[agentIndex] += move_time
+                if self.totalAgentTimes[agentIndex] > self.rules.getMaxTotalTime(agentIndex):
+                    print("Agent %d ran out of time! (time: %1.2f)" % (
+                        agentIndex, self.totalAgentTimes[agentIndex]), file=sys.stderr)
+                    self.agentTimeout = True
+                    self._agentCrash(agentIndex, quiet=True)
+                    return
+
+                self.moveHistory.append((agentIndex, action))
+                try:
+                    self.state = self.state.generateSuccessor(
+                        agentIndex, action)
+                except Exception as data:
+                    self._agentCrash(agentIndex)
+                    return
+            else:
+                action = self._turboMove(
+                    agentIndex, observers[agentIndex], actors[agentIndex])
+                self.moveHistory.append((agentIndex, action))
+                self.state = self.state.generateSuccessor(
+                    agentIndex, action)
+
+            self.rules.process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+        self.display.update(self.state.data)
+        self._finishGame()
+
+    def _turboMove(self, agentIndex, observe, act):
+        self.mute(agentIndex)
+        try:
+            if observe == None:
+                return act(self.state.deepCopy())
+            return act(observe(self.state.deepCopy()))
+        finally:
+            self.unmute()
+
+    def _registerAgents(self):
+        """
+        Hands every agent the initial state.  Returns False if one of them
+        failed, which ends the game.
+        """
+        # self.display.initialize(self.state.makeObservation(1).data)
+        # inform learning agents of the game start
+        for i in range(len(self.agents)):
+            agent = self.agents[i]
+            if not agent:
+                self.mute(i)
+                # this is a null agent, meaning it failed to load
+                # the other team wins
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self.unmute()
+                self._agentCrash(i, quiet=True)
+                return False
+            if ("registerInitialState" in dir(agent)):
+                self.mute(i)
+                if self.catchExceptions:
+                    try:
+                        timed_func = TimeoutFunction(
+                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
+                        try:
+                            start_time = time.time()
+                            timed_func(self.state.deepCopy())
+                            time_taken = time.time() - start_time
+                            self.totalAgentTimes[i] += time_taken
+                        except TimeoutFunctionException:
+                            print("Agent %d ran out of time on startup!" %
+                                  i, file=sys.stderr)
+                            self.unmute()
+                            self.agentTimeout = True
+                            self._agentCrash(i, quiet=True)
+                            return False
+                    except Exception as data:
+                        self._agentCrash(i, quiet=False)
+                        self.unmute()
+                        return False
+                else:
+                    agent.registerInitialState(self.state.deepCopy())
+                # TODO: could this exceed the total time
+                self.unmute()
+
+        return True
+
+    def _finishGame(self):
         # inform a learning agent of the game result
         for agentIndex, agent in enumerate(self.agents):
             if "final" in dir(agent):
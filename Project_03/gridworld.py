@@ -33,6 +33,10 @@ class Gridworld(mdp.MarkovDecisionProcess):
         self.noise = 0.2
         # self.noise = 0
 
+        # caches, built on first use
+        self._states = None
+        self._transitions = None
+
     def setLivingReward(self, reward):
         """
         The (negative) reward for exiting "normal" states.
@@ -42,12 +46,14 @@ class Gridworld(mdp.MarkovDecisionProcess):
         future rewards.
         """
         self.livingReward = reward
+        self._transitions = None
 
     def setNoise(self, noise):
         """
         The probability of moving in an unintended direction.
         """
         self.noise = noise
+        self._transitions = None
 
 
     def getPossibleActions(self, state):
@@ -75,14 +81,16 @@ class Gridworld(mdp.MarkovDecisionProcess):
         """
         Return list of all states.
         """
-        # The true terminal state.
-        states = [self.grid.terminalState]
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                if self.grid[x][y] != '#':
-                    state = (x,y)
-                    states.append(state)
-        return states
+        if self._states is None:
+            # The true terminal state.
+            states = [self.grid.terminalState]
+            for x in range(self.grid.width):
+                for y in range(self.grid.height):
+                    if self.grid[x][y] != '#':
+                        state = (x,y)
+                        states.append(state)
+            self._states = states
+        return list(self._states)
 
     def getReward(self, state, action, nextState):
         """
@@ -124,8 +132,24 @@ class Gridworld(mdp.MarkovDecisionProcess):
         representing the states reachable
         from 'state' by taking 'action' along
         with their transition probabilities.
+
+        The transitions of every (state, action) pair are computed
+        together on the first call and looked up after that, until
+        the noise or living reward changes.  The returned list is
+        shared, so callers must not modify it.
         """
+        if self._transitions is None:
+            transitions = {}
+            for s in self.getStates():
+                for a in self.getPossibleActions(s):
+                    transitions[(s, a)] = self.__computeTransitionStatesAndProbs(s, a)
+            self._transitions = transitions
+        successors = self._transitions.get((state, action))
+        if successors is None:
+            successors = self.__computeTransitionStatesAndProbs(state, action)
+        return successors
 
+    def __computeTransitionStatesAndProbs(self, state, action):
         if action not in self.getPossibleActions(state):
             raise Exception("Illegal action!")
 
@@ -405,6 +429,9 @@ def parseOptions():
     optParser.add_option('-i', '--iterations',action='store',
                          type='int',dest='iters',default=10,
                          metavar="K", help='Number of rounds of value iteration (default %default)')
+    optParser.add_option('--threshold',action='store',
+                         type='float',dest='threshold',default=None,
+                         metavar="T", help='Stop value iteration early once no value changes by more than T (vectorvalue only)')
     optParser.add_option('-k', '--episodes',action='store',
                          type='int',dest='episodes',default=1,
                          metavar="K", help='Number of epsiodes of the MDP to run (default %default)')
@@ -415,7 +442,7 @@ def parseOptions():
                          help='Request a window width of X pixels *per grid cell* (default %default)')
     optParser.add_option('-a', '--agent',action='store', metavar="A",
                          type='string',dest='agent',default="random",
-                         help='Agent type (options are \'random\', \'value\', \'q\', and \'learn\', default %default)')
+                         help='Agent type (options are \'random\', \'value\', \'vectorvalue\', \'asynchvalue\', \'priosweepvalue\', \'q\', and \'learn\', default %default)')
     optParser.add_option('-t', '--text',action='store_true',
                          dest='textDisplay',default=False,
                          help='Use text-only ASCII display')
@@ -490,6 +517,8 @@ if __name__ == '__main__':
     a = None
     if opts.agent == 'value':
         a = valueIterationAgents.ValueIterationAgent(mdp, opts.discount, opts.iters)
+    elif opts.agent == 'vectorvalue':
+        a = valueIterationAgents.VectorizedValueIterationAgent(mdp, opts.discount, opts.iters, opts.threshold)
     elif opts.agent == 'learn':
         print("HERE")
         gridWorldEnv = GridworldEnvironment(mdp)
@@ -532,6 +561,8 @@ if __name__ == '__main__':
         a = valueIterationAgents.PrioritizedSweepingValueIterationAgent(mdp, opts.discount, opts.iters)
     else:
         if not opts.manual: raise Exception('Unknown agent type: '+opts.agent)
+    if hasattr(a, 'backups'):
+        print('Ran %d Bellman backups' % a.backups)
 
 
     ###########################
@@ -539,7 +570,7 @@ if __name__ == '__main__':
     ###########################
     # DISPLAY Q/V VALUES BEFORE SIMULATION OF EPISODES
     try:
-        if not opts.manual and opts.agent in ('value', 'asynchvalue', 'priosweepvalue', 'learn'):
+        if not opts.manual and opts.agent in ('value', 'vectorvalue', 'asynchvalue', 'priosweepvalue', 'learn'):
             if opts.valueSteps:
                 for i in range(opts.iters):
                     tempAgent = valueIterationAgents.ValueIterationAgent(mdp, opts.discount, i)
@@ -561,7 +592,7 @@ if __name__ == '__main__':
         if opts.manual and opts.agent == None:
             displayCallback = lambda state: display.displayNullValues(state)
         else:
-            if opts.agent in ('random', 'value', 'asynchvalue', 'priosweepvalue'):
+            if opts.agent in ('random', 'value', 'vectorvalue', 'asynchvalue', 'priosweepvalue'):
                 displayCallback = lambda state: display.displayValues(a, state, "CURRENT VALUES")
             if opts.agent == 'q': displayCallback = lambda state: display.displayQValues(a, state, "CURRENT Q-VALUES")
 
@@ -65,3 +65,52 @@ class MarkovDecisionProcess:
         are equivalent.
         """
         abstract
+
+class CompiledMDP:
+    """
+    A flat, index-based copy of a MarkovDecisionProcess, built once by
+    walking every state and action.  Solvers can sweep over these lists
+    (or arrays made from them) instead of calling back into the MDP for
+    every backup.
+
+    States are numbered in getStates() order, followed by any states that
+    are only reached through transitions.  The (state, action) rows of a
+    state are numbered contiguously in getPossibleActions() order:
+
+      states[i], index[state]          the states and their numbers
+      terminal[i]                      whether state i is terminal
+      rowStart[i]:rowStart[i+1]        the rows of state i
+      rowState[r], rowAction[r]        the state number and action of row r
+      rowReward[r]                     the expected reward of row r
+      transStart[r]:transStart[r+1]    the transitions of row r
+      transNext[t], transProb[t]       their next-state numbers and probabilities
+    """
+    def __init__(self, mdp):
+        self.states = list(mdp.getStates())
+        self.index = dict((state, i) for i, state in enumerate(self.states))
+        self.terminal = []
+        self.rowStart = []
+        self.rowState, self.rowAction, self.rowReward = [], [], []
+        self.transStart, self.transNext, self.transProb = [], [], []
+
+        i = 0
+        while i < len(self.states):
+            state = self.states[i]
+            self.terminal.append(mdp.isTerminal(state))
+            self.rowStart.append(len(self.rowState))
+            for action in mdp.getPossibleActions(state):
+                self.rowState.append(i)
+                self.rowAction.append(action)
+                self.transStart.append(len(self.transNext))
+                reward = 0.0
+                for nextState, prob in mdp.getTransitionStatesAndProbs(state, action):
+                    if nextState not in self.index:
+                        self.index[nextState] = len(self.states)
+                        self.states.append(nextState)
+                    self.transNext.append(self.index[nextState])
+                    self.transProb.append(prob)
+                    reward += prob * mdp.getReward(state, action, nextState)
+                self.rowReward.append(reward)
+            i += 1
+        self.rowStart.append(len(self.rowState))
+        self.transStart.append(len(self.transNext))
@@ -52,6 +52,7 @@ import types
 import time
 import random
 import os
+import contextlib
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -77,15 +78,39 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of which states have been generated.  It is
+    # None unless explored-state tracking is on (see trackExplored), so normal
+    # games neither pay for hashing every successor nor grow an unbounded set.
+    # Any counter with add, copy and clear can stand in for the default set.
+    explored = None
 
     def getAndResetExplored():
+        if GameState.explored is None:
+            return set()
         tmp = GameState.explored.copy()
-        GameState.explored = set()
+        GameState.explored.clear()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def trackExplored(counter=None):
+        """
+        Records generated states in counter (a new set by default) for the
+        duration of a with block, restoring the previous setting afterwards:
+
+          with GameState.trackExplored() as explored:
+              agent.getAction(state)
+          print(len(explored))
+        """
+        previous = GameState.explored
+        if counter is None:
+            counter = set()
+        GameState.explored = counter
+        try:
+            yield counter
+        finally:
+            GameState.explored = previous
+    trackExplored = staticmethod(contextlib.contextmanager(trackExplored))
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -129,8 +154,9 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.explored is not None:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -280,14 +306,25 @@ class ClassicGameRules:
     and how the game starts and ends.
     """
 
-    def __init__(self, timeout=30):
+    def __init__(self, timeout=30, trackExplored=False):
         self.timeout = timeout
+        self.trackExplored = trackExplored
+
+    def exploredTracking(self):
+        """
+        Context to run a game in: records explored states in a fresh
+        GameState.explored if this rule set tracks them, otherwise does nothing.
+        """
+        if self.trackExplored:
+            return GameState.trackExplored()
+        return contextlib.nullcontext()
 
-    def newGame(self, layout, horizon, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
+    def newGame(self, layout, horizon, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False, turbo=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
-        game = Game(agents, horizon, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, horizon, display, self,
+                    catchExceptions=catchExceptions, turbo=turbo)
         game.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
@@ -683,11 +720,11 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, horizon, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def runGames(layout, horizon, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30, trackExplored=False):
     import __main__
     __main__.__dict__['_display'] = display
 
-    rules = ClassicGameRules(timeout)
+    rules = ClassicGameRules(timeout, trackExplored)
     games = []
 
     for i in range(numGames):
@@ -702,9 +739,11 @@ def runGames(layout, horizon, pacman, ghosts, display, numGames, record, numTrai
         else:
             gameDisplay = display
             rules.quiet = False
+        # Training games are headless, so they take the turbo game loop
         game = rules.newGame(layout, horizon, pacman, ghosts,
-                             gameDisplay, beQuiet, catchExceptions)
-        game.run()
+                             gameDisplay, beQuiet, catchExceptions, turbo=beQuiet)
+        with rules.exploredTracking():
+            game.run()
         if not beQuiet:
             games.append(game)
 
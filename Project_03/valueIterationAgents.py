@@ -30,6 +30,14 @@ import mdp, util
 
 from learningAgents import ValueEstimationAgent
 import collections
+import heapq
+import itertools
+
+try:
+    import numpy
+    _NUMPY_ENABLED = True
+except ImportError:
+    _NUMPY_ENABLED = False
 
 class ValueIterationAgent(ValueEstimationAgent):
     """
@@ -57,6 +65,7 @@ class ValueIterationAgent(ValueEstimationAgent):
         self.discount = discount
         self.iterations = iterations
         self.values = util.Counter() # A Counter is a dict with default 0
+        self.backups = 0 # Number of Bellman backups run
         self.runValueIteration()
 
     def runValueIteration(self):
@@ -79,6 +88,7 @@ class ValueIterationAgent(ValueEstimationAgent):
                     pass
                 else:
                     current_values[state] = max(q_values)
+                    self.backups += 1
 
             if self.iterations<0:
                 break
@@ -146,3 +156,210 @@ class ValueIterationAgent(ValueEstimationAgent):
 
     def getQValue(self, state, action):
         return self.computeQValueFromValues(state, action)
+
+class VectorizedValueIterationAgent(ValueIterationAgent):
+    """
+        A ValueIterationAgent that compiles the mdp into flat arrays
+        once (see mdp.CompiledMDP) and runs each sweep as one batched
+        Bellman backup over them, using NumPy when it is installed and
+        plain lists otherwise.  Sweeping stops after the given number of
+        iterations, or earlier once no value changes by more than
+        threshold.
+    """
+    def __init__(self, mdp: mdp.MarkovDecisionProcess, discount = 0.9, iterations = 100, threshold = None):
+        self.threshold = threshold
+        self.sweeps = 0
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def runValueIteration(self):
+        compiled = mdp.CompiledMDP(self.mdp)
+        if _NUMPY_ENABLED:
+            values = self.sweepArrays(compiled)
+        else:
+            values = self.sweepLists(compiled)
+        self.values = util.Counter()
+        for state, value in zip(compiled.states, values):
+            self.values[state] = value
+        rowStart = compiled.rowStart
+        self.backups = self.sweeps * len([i for i in range(len(values)) if rowStart[i] < rowStart[i+1]])
+
+    def converged(self, delta):
+        return self.threshold is not None and delta <= self.threshold
+
+    def sweepArrays(self, compiled):
+        """
+          Runs the sweeps with NumPy.  The transitions are kept in
+          coordinate form, so the expected future value of every row is a
+          single bincount over them.
+        """
+        numRows = len(compiled.rowState)
+        transRow = numpy.repeat(numpy.arange(numRows), numpy.diff(compiled.transStart))
+        transNext = numpy.array(compiled.transNext, dtype=int)
+        rowState = numpy.array(compiled.rowState, dtype=int)
+        rowReward = numpy.array(compiled.rowReward, dtype=float)
+
+        # Terminal states have no future rewards
+        future = self.discount * numpy.array(compiled.transProb, dtype=float)
+        future[numpy.array(compiled.terminal, dtype=bool)[rowState[transRow]]] = 0.0
+
+        # Rows are grouped by state, so each state's best action is a
+        # reduceat over the first rows of the states that have actions
+        hasActions = numpy.diff(compiled.rowStart) > 0
+        firstRows = numpy.array(compiled.rowStart[:-1], dtype=int)[hasActions]
+
+        values = numpy.zeros(len(compiled.states))
+        while self.sweeps < self.iterations:
+            qValues = rowReward + numpy.bincount(transRow, weights=future * values[transNext], minlength=numRows)
+            newValues = values.copy()
+            if len(firstRows) > 0:
+                newValues[hasActions] = numpy.maximum.reduceat(qValues, firstRows)
+            delta = numpy.abs(newValues - values).max() if len(values) > 0 else 0.0
+            values = newValues
+            self.sweeps += 1
+            if self.converged(delta):
+                break
+        return values.tolist()
+
+    def sweepLists(self, compiled):
+        """
+          Runs the same sweeps over the compiled lists in pure Python.
+        """
+        rowStart, transStart, transNext = compiled.rowStart, compiled.transStart, compiled.transNext
+        future = []
+        for r in range(len(compiled.rowState)):
+            terminal = compiled.terminal[compiled.rowState[r]]
+            for t in range(transStart[r], transStart[r+1]):
+                future.append(0.0 if terminal else self.discount * compiled.transProb[t])
+
+        values = [0.0] * len(compiled.states)
+        while self.sweeps < self.iterations:
+            newValues = list(values)
+            delta = 0.0
+            for i in range(len(values)):
+                if rowStart[i] == rowStart[i+1]:
+                    continue
+                best = None
+                for r in range(rowStart[i], rowStart[i+1]):
+                    qValue = compiled.rowReward[r]
+                    for t in range(transStart[r], transStart[r+1]):
+                        qValue += future[t] * values[transNext[t]]
+                    if best is None or qValue > best:
+                        best = qValue
+                newValues[i] = best
+                delta = max(delta, abs(best - values[i]))
+            values = newValues
+            self.sweeps += 1
+            if self.converged(delta):
+                break
+        return values
+
+class AsynchronousValueIterationAgent(ValueIterationAgent):
+    """
+        * Please read learningAgents.py before reading this.*
+
+        An AsynchronousValueIterationAgent takes a Markov decision process
+        (see mdp.py) on initialization and runs cyclic value iteration
+        for a given number of iterations using the supplied
+        discount factor.  Each iteration updates a single state in
+        place, cycling through mdp.getStates().
+    """
+    def __init__(self, mdp: mdp.MarkovDecisionProcess, discount = 0.9, iterations = 1000):
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def runValueIteration(self):
+        states = self.mdp.getStates()
+        for i in range(self.iterations):
+            state = states[i % len(states)]
+            if not self.mdp.isTerminal(state):
+                self.backup(state)
+
+    def computeMaxQValue(self, state):
+        """
+          The best Q-value of state under the current values, or None
+          when state has no legal actions.
+        """
+        actions = self.mdp.getPossibleActions(state)
+        if len(actions) == 0:
+            return None
+        return max([self.computeQValueFromValues(state, action) for action in actions])
+
+    def backup(self, state):
+        """
+          Updates the value of state in place from its best Q-value.
+        """
+        qValue = self.computeMaxQValue(state)
+        if qValue is not None:
+            self.values[state] = qValue
+            self.backups += 1
+
+class PrioritizedSweepingValueIterationAgent(AsynchronousValueIterationAgent):
+    """
+        * Please read learningAgents.py before reading this.*
+
+        A PrioritizedSweepingValueIterationAgent takes a Markov decision process
+        (see mdp.py) on initialization and runs prioritized sweeping value iteration
+        for a given number of iterations using the supplied parameters.  States
+        are backed up in order of their Bellman error, and a state is only
+        queued again when a successor changes its error by more than theta.
+    """
+    def __init__(self, mdp, discount = 0.9, iterations = 100, theta = 1e-5):
+        """
+          Your prioritized sweeping value iteration agent should take an mdp on
+          construction, run the indicated number of iterations,
+          and then act according to the resulting policy.
+        """
+        self.theta = theta
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def computePredecessors(self):
+        """
+          Maps every state to the set of states that can reach it
+          with nonzero probability in one step.
+        """
+        predecessors = collections.defaultdict(set)
+        for state in self.mdp.getStates():
+            for action in self.mdp.getPossibleActions(state):
+                for nextState, prob in self.mdp.getTransitionStatesAndProbs(state, action):
+                    if prob > 0:
+                        predecessors[nextState].add(state)
+        return predecessors
+
+    def bellmanError(self, state):
+        qValue = self.computeMaxQValue(state)
+        if qValue is None:
+            return 0
+        return abs(self.values[state] - qValue)
+
+    def runValueIteration(self):
+        predecessors = self.computePredecessors()
+
+        # A min-heap of (-error, count, state), so the largest error pops
+        # first.  Raising the error of a queued state pushes a new entry
+        # and leaves the old one to be skipped when it surfaces, rather
+        # than searching the heap for it as util.PriorityQueue.update does.
+        heap = []
+        queued = {}
+        order = itertools.count()
+        def update(state, error):
+            if state in queued and queued[state] >= error:
+                return
+            queued[state] = error
+            heapq.heappush(heap, (-error, next(order), state))
+
+        for state in self.mdp.getStates():
+            if not self.mdp.isTerminal(state):
+                update(state, self.bellmanError(state))
+
+        for i in range(self.iterations):
+            while len(heap) > 0 and queued.get(heap[0][2]) != -heap[0][0]:
+                heapq.heappop(heap)
+            if len(heap) == 0:
+                break
+            state = heapq.heappop(heap)[2]
+            del queued[state]
+            if not self.mdp.isTerminal(state):
+                self.backup(state)
+            for predecessor in predecessors[state]:
+                error = self.bellmanError(predecessor)
+                if error > self.theta:
+                    update(predecessor, error)
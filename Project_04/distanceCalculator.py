@@ -143,15 +143,21 @@ class DistanceCalculator(threading.Thread):
     self.distancer._distances = distances
 
 def computeDistances(layout):
+    import util
     distances = {}
     allNodes = layout.walls.asList(False)
+    # The neighbours of a square are the same for every source
+    neighbours = {}
+    for node in allNodes:
+        x, y = node
+        neighbours[node] = [other for other in ((x,y+1), (x,y-1), (x+1,y), (x-1,y))
+                            if not layout.isWall(other)]
     for source in allNodes:
         dist = {}
         closed = {}
         for node in allNodes:
             dist[node] = 1000000000
-        import util
-        queue = util.PriorityQueue()
+        queue = util.IndexedPriorityQueue()
         queue.push(source, 0)
         dist[source] = 0
         while not queue.isEmpty():
@@ -160,24 +166,14 @@ def computeDistances(layout):
                 continue
             closed[node] = True
             nodeDist = dist[node]
-            adjacent = []
-            x, y = node
-            if not layout.isWall((x,y+1)):
-                adjacent.append((x,y+1))
-            if not layout.isWall((x,y-1)):
-                adjacent.append((x,y-1) )
-            if not layout.isWall((x+1,y)):
-                adjacent.append((x+1,y) )
-            if not layout.isWall((x-1,y)):
-                adjacent.append((x-1,y))
-            for other in adjacent:
+            for other in neighbours[node]:
                 if not other in dist:
                     continue
                 oldDist = dist[other]
                 newDist = nodeDist+1
                 if newDist < oldDist:
                     dist[other] = newDist
-                    queue.push(other, newDist)
+                    queue.update(other, newDist)
         for target in allNodes:
             distances[(target, source)] = dist[target]
     return distances
@@ -58,7 +58,8 @@ from game import Grid
 from game import Configuration
 from game import Agent
 from game import reconstituteGrid
-import sys, util, types, time, random, imp
+from game import GameProfile
+import sys, os, util, types, time, random, imp
 import keyboardAgents
 
 # If you change these, you won't affect the server, so you can't cheat
@@ -119,6 +120,7 @@ class GameState:
     AgentRules.applyAction( state, action, agentIndex )
     AgentRules.checkDeath(state, agentIndex)
     AgentRules.decrementTimer(state.data.agentStates[agentIndex])
+    state.data.updateAgentHash(agentIndex)
 
     # Book keeping
     state.data._agentMoved = agentIndex
@@ -271,8 +273,25 @@ class GameState:
     state.agentDistances = self.agentDistances[:]
     return state
 
+  def view( self ):
+    """
+    Returns a view of this state for an agent.  Its data is a copy (see
+    GameStateData.view); the team lists are shared, as nothing changes them
+    once the game starts.
+    """
+    state = GameState()
+    state.data = self.data.view()
+    state.data.timeleft = self.data.timeleft
+    state.blueTeam = self.blueTeam
+    state.redTeam = self.redTeam
+    state.teams = self.teams
+    state.agentDistances = self.agentDistances
+    return state
+
   def makeObservation(self, index):
-    state = self.deepCopy()
+    # The view copies the agent states, so hiding enemies below leaves this
+    # state untouched
+    state = self.view()
 
     # ***BEGIN REMOVED FOR CONTEST 2***
     # Adds the sonar signal
@@ -295,7 +314,9 @@ class GameState:
       for teammate in team:
         if util.manhattanDistance(enemyPos, state.getAgentPosition(teammate)) <= SIGHT_RANGE:
           seen = True
-      if not seen: state.data.agentStates[enemy].configuration = None
+      if not seen:
+        state.data.agentStates[enemy].configuration = None
+        state.data.updateAgentHash(enemy)
     # ***END REMOVED FOR CONTEST 2***
     return state
 
@@ -374,12 +395,13 @@ class CaptureRules:
   def __init__(self, quiet = False):
     self.quiet = quiet
 
-  def newGame( self, layout, agents, display, length, muteAgents, catchExceptions ):
+  def newGame( self, layout, agents, display, length, muteAgents, catchExceptions, turbo=False, profile=None ):
     initState = GameState()
     initState.initialize( layout, len(agents) )
     starter = random.randint(0,1)
-    print(('%s team starts' % ['Red', 'Blue'][starter]))
-    game = Game(agents, display, self, startingIndex=starter, muteAgents=muteAgents, catchExceptions=catchExceptions)
+    if not self.quiet:
+      print(('%s team starts' % ['Red', 'Blue'][starter]))
+    game = Game(agents, display, self, startingIndex=starter, muteAgents=muteAgents, catchExceptions=catchExceptions, turbo=turbo, profile=profile)
     game.state = initState
     game.length = length
     game.state.data.timeleft = length
@@ -488,6 +510,7 @@ class AgentRules:
     vector = Actions.directionToVector( action, speed )
     oldConfig = agentState.configuration
     agentState.configuration = oldConfig.generateSuccessor( vector )
+    state.data.updateAgentHash(agentIndex)
 
     # Eat
     next = agentState.configuration.getPosition()
@@ -547,6 +570,7 @@ class AgentRules:
       #state.data.scoreChange += score
       state.data.food = state.data.food.copy()
       state.data.food[x][y] = False
+      state.data.updateFoodHash(position)
       state.data._foodEaten = position
       #if (isRed and state.getBlueFood().count() == MIN_FOOD) or (not isRed and state.getRedFood().count() == MIN_FOOD):
       #  state.data._win = True
@@ -556,6 +580,7 @@ class AgentRules:
     else: myCapsules = state.getRedCapsules()
     if( position in myCapsules ):
       state.data.capsules.remove( position )
+      state.data.updateCapsuleHash(position)
       state.data._capsuleEaten = position
 
       # Reset all ghosts' scared timers
@@ -563,6 +588,7 @@ class AgentRules:
       else: otherTeam = state.getRedTeamIndices()
       for index in otherTeam:
         state.data.agentStates[index].scaredTimer = SCARED_TIME
+        state.data.updateAgentHash(index)
 
   consume = staticmethod( consume )
 
@@ -645,13 +671,14 @@ class AgentRules:
       return [(x + dx, y + dy) for dx in DX for dy in DY]
 
     # BFS graph search
-    positionQueue = [agentState.getPosition()]
+    positionQueue = util.Queue()
+    positionQueue.push(agentState.getPosition())
     seen = set()
     while numToDump > 0:
-      if not len(positionQueue):
+      if positionQueue.isEmpty():
         raise Exception('Exhausted BFS! uh oh')
       # pop one off, graph check
-      popped = positionQueue.pop(0)
+      popped = positionQueue.pop()
       if popped in seen:
         continue
       seen.add(popped)
@@ -661,11 +688,13 @@ class AgentRules:
       y = int(y)
       if (allGood(state, x, y)):
         state.data.food[x][y] = True
+        state.data.updateFoodHash((x, y))
         foodAdded.append((x, y))
         numToDump -= 1
 
       # generate successors
-      positionQueue = positionQueue + genSuccessors(x, y)
+      for successor in genSuccessors(x, y):
+        positionQueue.push(successor)
 
     state.data._foodAdded = foodAdded
     # now our agentState is no longer carrying food
@@ -698,6 +727,7 @@ class AgentRules:
             agentState.isPacman = False
             agentState.configuration = agentState.start
             agentState.scaredTimer = 0
+            state.data.updateAgentHash(agentIndex)
           else:
             score = KILL_POINTS
             if state.isOnRedTeam(agentIndex):
@@ -706,6 +736,7 @@ class AgentRules:
             otherAgentState.isPacman = False
             otherAgentState.configuration = otherAgentState.start
             otherAgentState.scaredTimer = 0
+            state.data.updateAgentHash(index)
     else: # Agent is a ghost
       for index in otherTeam:
         otherAgentState = state.data.agentStates[index]
@@ -724,6 +755,7 @@ class AgentRules:
             otherAgentState.isPacman = False
             otherAgentState.configuration = otherAgentState.start
             otherAgentState.scaredTimer = 0
+            state.data.updateAgentHash(index)
           else:
             score = KILL_POINTS
             if state.isOnRedTeam(agentIndex):
@@ -732,6 +764,7 @@ class AgentRules:
             agentState.isPacman = False
             agentState.configuration = agentState.start
             agentState.scaredTimer = 0
+            state.data.updateAgentHash(agentIndex)
   checkDeath = staticmethod( checkDeath )
 
   def placeGhost(state, ghostState):
@@ -817,6 +850,10 @@ def readCommand( argv ):
                     help=default('How many episodes are training (suppresses output)'), default=0)
   parser.add_option('-c', '--catchExceptions', action='store_true', default=False,
                     help='Catch exceptions and enforce time limits')
+  parser.add_option('--profile', default=None,
+                    help='Writes a JSON summary of where the time of each game went to this file')
+  parser.add_option('--pstats', default=None,
+                    help='With --profile, also runs cProfile and writes each game\'s stats to this directory')
 
   options, otherjunk = parser.parse_args(argv)
   assert len(otherjunk) == 0, "Unrecognized options: " + str(otherjunk)
@@ -884,20 +921,9 @@ def readCommand( argv ):
     args['agents'][index] = agent
 
   # Choose a layout
-  import layout
   layouts = []
   for i in range(options.numGames):
-    if options.layout == 'RANDOM':
-      l = layout.Layout(randomLayout().split('\n'))
-    elif options.layout.startswith('RANDOM'):
-      l = layout.Layout(randomLayout(int(options.layout[6:])).split('\n'))
-    elif options.layout.lower().find('capture') == -1:
-      raise Exception( 'You must use a capture layout with capture.py')
-    else:
-      l = layout.getLayout( options.layout )
-    if l == None: raise Exception("The layout " + options.layout + " cannot be found")
-
-    layouts.append(l)
+    layouts.append(loadLayout(options.layout))
 
   args['layouts'] = layouts
   args['length'] = options.time
@@ -905,8 +931,24 @@ def readCommand( argv ):
   args['numTraining'] = options.numTraining
   args['record'] = options.record
   args['catchExceptions'] = options.catchExceptions
+  args['profile'] = options.profile
+  args['pstats'] = options.pstats
   return args
 
+def loadLayout(name):
+  "Loads a capture layout by name; RANDOM and RANDOM<seed> give random mazes"
+  import layout
+  if name == 'RANDOM':
+    l = layout.Layout(randomLayout().split('\n'))
+  elif name.startswith('RANDOM'):
+    l = layout.Layout(randomLayout(int(name[6:])).split('\n'))
+  elif name.lower().find('capture') == -1:
+    raise Exception( 'You must use a capture layout with capture.py')
+  else:
+    l = layout.getLayout( name )
+  if l == None: raise Exception("The layout " + name + " cannot be found")
+  return l
+
 def randomLayout(seed = None):
   if not seed:
     seed = random.randint(0,99999999)
@@ -916,16 +958,33 @@ def randomLayout(seed = None):
   return mazeGenerator.generateMaze(seed)
 
 import traceback
-def loadAgents(isRed, factory, textgraphics, cmdLineArgs):
-  "Calls agent factories and returns lists of agents"
+def loadTeam(isRed, factory, moduleName=None):
+  """
+  Loads a team module, returning None (after reporting why) if it has no
+  createTeam.  It is loaded as player0 or player1 unless moduleName is given;
+  a team loaded under a name already in use replaces that module.
+  """
   try:
     if not factory.endswith(".py"):
       factory += ".py"
 
-    module = imp.load_source('player' + str(int(isRed)), factory)
+    if moduleName == None:
+      moduleName = 'player' + str(int(isRed))
+    module = imp.load_source(moduleName, factory)
   except (NameError, ImportError):
     print('Error: The team "' + factory + '" could not be loaded! ', file=sys.stderr)
     traceback.print_exc()
+    return None
+
+  if not hasattr(module, 'createTeam'):
+    print('Error: The team "' + factory + '" could not be loaded! ', file=sys.stderr)
+    return None
+  return module
+
+def loadAgents(isRed, factory, textgraphics, cmdLineArgs):
+  "Calls agent factories and returns lists of agents"
+  module = loadTeam(isRed, factory)
+  if module == None:
     return [None for i in range(2)]
 
   args = dict()
@@ -937,18 +996,14 @@ def loadAgents(isRed, factory, textgraphics, cmdLineArgs):
   # if textgraphics and factoryClassName.startswith('Keyboard'):
   #   raise Exception('Using the keyboard requires graphics (no text display, quiet or training games)')
 
-  try:
-    createTeamFunc = getattr(module, 'createTeam')
-  except AttributeError:
-    print('Error: The team "' + factory + '" could not be loaded! ', file=sys.stderr)
-    traceback.print_exc()
-    return [None for i in range(2)]
+  return createTeamAgents(module, isRed, args)
 
+def createTeamAgents(module, isRed, args):
   indexAddend = 0
   if not isRed:
     indexAddend = 1
   indices = [2*i + indexAddend for i in range(2)]
-  return createTeamFunc(indices[0], indices[1], isRed, **args)
+  return module.createTeam(indices[0], indices[1], isRed, **args)
 
 def replayGame( layout, agents, actions, display, length, redTeamName, blueTeamName ):
     rules = CaptureRules()
@@ -968,10 +1023,11 @@ def replayGame( layout, agents, actions, display, length, redTeamName, blueTeamN
 
     display.finish()
 
-def runGames( layouts, agents, display, length, numGames, record, numTraining, redTeamName, blueTeamName, muteAgents=False, catchExceptions=False ):
+def runGames( layouts, agents, display, length, numGames, record, numTraining, redTeamName, blueTeamName, muteAgents=False, catchExceptions=False, profile=None, pstats=None ):
 
   rules = CaptureRules()
   games = []
+  profiles = {}
 
   if numTraining > 0:
     print('Playing %d training games' % numTraining)
@@ -987,9 +1043,13 @@ def runGames( layouts, agents, display, length, numGames, record, numTraining, r
     else:
         gameDisplay = display
         rules.quiet = False
-    g = rules.newGame( layout, agents, gameDisplay, length, muteAgents, catchExceptions )
+    # Training games are headless, so they take the turbo game loop
+    gameProfile = None
+    if profile != None: gameProfile = makeGameProfile(pstats, i)
+    g = rules.newGame( layout, agents, gameDisplay, length, muteAgents, catchExceptions, turbo=beQuiet, profile=gameProfile )
     g.run()
     if not beQuiet: games.append(g)
+    if gameProfile != None: profiles[i] = gameProfile.summary()
 
     g.record = None
     if record:
@@ -1012,12 +1072,167 @@ def runGames( layouts, agents, display, length, numGames, record, numTraining, r
     print('Red Win Rate:  %d/%d (%.2f)' % ([s > 0 for s in scores].count(True), len(scores), redWinRate))
     print('Blue Win Rate: %d/%d (%.2f)' % ([s < 0 for s in scores].count(True), len(scores), blueWinRate))
     print('Record:       ', ', '.join([('Blue', 'Tie', 'Red')[max(0, min(2, 1 + s))] for s in scores]))
+  if profile != None: writeProfile(profile, profiles)
   return games
 
+def makeGameProfile(pstats, i):
+  """
+  Returns the GameProfile for game number i, which dumps cProfile stats into
+  the directory pstats if that is given.
+  """
+  if pstats == None: return GameProfile()
+  if not os.path.isdir(pstats): os.makedirs(pstats)
+  return GameProfile(os.path.join(pstats, 'game-%d.pstats' % (i + 1)))
+
+def writeProfile(fileName, profiles):
+  """
+  Writes the GameProfile summaries of a run, by game number, to fileName as
+  JSON, along with their total.
+  """
+  import json
+  numbers = sorted(profiles)
+  report = {'games': [dict(game=i + 1, **profiles[i]) for i in numbers],
+            'total': GameProfile.combine([profiles[i] for i in numbers])}
+  with open(fileName, 'w') as f:
+    json.dump(report, f, indent=2)
+  print('Wrote the profile of %d games to %s' % (len(numbers), fileName))
+
 def save_score(game):
     with open('score', 'w') as f:
         print(game.state.data.score, file=f)
 
+###############
+# TOURNAMENTS #
+###############
+
+TOURNAMENT_FIELDS = ['game', 'red', 'blue', 'layout', 'seed', 'score', 'winner',
+                     'moves', 'crashed', 'timedOut', 'seconds']
+
+def runTournament( schedule, outputFile, workers=1, length=1200, catchExceptions=True, muteAgents=True ):
+  """
+  Plays every game of schedule, a sequence of (red team, blue team, layout)
+  triples, and writes one row per game to outputFile as games finish: CSV if
+  its name ends in .csv, JSON lines otherwise.  Returns the rows in schedule
+  order.
+
+  The layout is a layout name, RANDOM<seed>, or RANDOM for a maze whose seed
+  is picked here and recorded in the row.  Games are played in this process
+  or, with workers > 1, in that many long-lived worker processes.  Either
+  way each process loads a team module once and keeps parsed layouts and
+  maze distances between games; every game gets fresh agents and its own
+  seed drawn from random, so seeding random first makes a run repeatable.
+  A team that cannot be loaded forfeits its games, which are recorded as
+  crashes, and the rest of the schedule still runs.
+  """
+  games = []
+  for i, (red, blue, layoutName) in enumerate(schedule):
+    if layoutName == 'RANDOM':
+      layoutName = 'RANDOM%d' % random.randint(0,99999999)
+    games.append((i, red, blue, layoutName, random.randrange(2 ** 31), length, catchExceptions, muteAgents))
+
+  import csv, json
+  results = []
+  with open(outputFile, 'w', newline='') as f:
+    if outputFile.endswith('.csv'):
+      writer = csv.DictWriter(f, TOURNAMENT_FIELDS)
+      writer.writeheader()
+      writeRow = writer.writerow
+    else:
+      writeRow = lambda row: f.write(json.dumps(row) + '\n')
+
+    def finished(row):
+      writeRow(row)
+      f.flush()
+      results.append(row)
+      print('Game %(game)d: %(red)s vs %(blue)s on %(layout)s, score %(score)d' % row)
+
+    if workers > 1:
+      import multiprocessing
+      with multiprocessing.Pool(workers) as pool:
+        for row in pool.imap_unordered(playTournamentGame, games):
+          finished(row)
+    else:
+      for game in games:
+        finished(playTournamentGame(game))
+
+  results.sort(key=lambda row: row['game'])
+  return results
+
+# What a tournament process keeps between games
+tournamentTeams = {}
+tournamentLayouts = {}
+
+def tournamentTeam( isRed, team ):
+  """
+  Returns the module of team for one colour, loading it the first time.
+  Every team gets a module name of its own, so that loading one team never
+  replaces another that is already cached.  Raises an exception if the team
+  cannot be loaded, then and in every later game.
+  """
+  key = (isRed, team)
+  if key not in tournamentTeams:
+    name = 'tournament%d_%s' % (len(tournamentTeams), ''.join(c if c.isalnum() else '_' for c in team))
+    tournamentTeams[key] = None  # Stays None if loading raises
+    tournamentTeams[key] = loadTeam(isRed, team, name)
+  if tournamentTeams[key] == None:
+    raise Exception('The team %s cannot be loaded' % team)
+  return tournamentTeams[key]
+
+def playTournamentGame( game ):
+  "Plays one game of runTournament and returns its row"
+  number, red, blue, layoutName, seed, length, catchExceptions, muteAgents = game
+  import textDisplay, distanceCalculator
+  start = time.time()
+  random.seed(seed)
+
+  teams = []
+  failed = []
+  for isRed, team in [(True, red), (False, blue)]:
+    try:
+      teams.append(createTeamAgents(tournamentTeam(isRed, team), isRed, {}))
+    except Exception:
+      if not catchExceptions: raise
+      traceback.print_exc()
+      failed.append(isRed)
+  if failed:
+    # A team that cannot be loaded or set up forfeits, as if it had crashed
+    score = 0
+    if True in failed: score -= CRASH_PENALTY
+    if False in failed: score += CRASH_PENALTY
+    return tournamentRow(number, red, blue, layoutName, seed, score, 0, True, False, start)
+  agents = sum([list(el) for el in zip(teams[0], teams[1])],[])
+
+  # Random mazes seldom come up twice, so neither they nor their maze
+  # distances are kept
+  isRandom = layoutName.startswith('RANDOM')
+  if isRandom:
+    layout = loadLayout(layoutName)
+  else:
+    if layoutName not in tournamentLayouts:
+      tournamentLayouts[layoutName] = loadLayout(layoutName)
+    layout = tournamentLayouts[layoutName]
+  cacheDir = distanceCalculator.CACHE_DIR
+  if isRandom:
+    distanceCalculator.CACHE_DIR = None
+  try:
+    rules = CaptureRules(quiet=True)
+    g = rules.newGame( layout, agents, textDisplay.NullGraphics(), length, muteAgents, catchExceptions, turbo=True )
+    g.run()
+  finally:
+    distanceCalculator.CACHE_DIR = cacheDir
+    if isRandom:
+      distanceCalculator.distanceMap.pop(layout.walls, None)
+
+  return tournamentRow(number, red, blue, layoutName, seed, g.state.data.score,
+                       len(g.moveHistory), g.agentCrashed, g.agentTimeout, start)
+
+def tournamentRow( number, red, blue, layoutName, seed, score, moves, crashed, timedOut, start ):
+  "The row runTournament records for one game"
+  return {'game': number, 'red': red, 'blue': blue, 'layout': layoutName, 'seed': seed,
+          'score': score, 'winner': ('Blue', 'Tie', 'Red')[max(0, min(2, 1 + score))],
+          'moves': moves, 'crashed': crashed, 'timedOut': timedOut,
+          'seconds': round(time.time() - start, 3)}
+
 if __name__ == '__main__':
   """
   The main function called when pacman.py is run
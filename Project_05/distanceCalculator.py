@@ -19,9 +19,15 @@ caches the shortest path between any two points in the maze.
 Example:
 distancer = Distancer(gameState.data.layout)
 distancer.getDistance( (1,1), (10,10) )
+
+Agents that measure many distances from one position can use the batched
+calls instead:
+distancer.getDistances( (1,1), foodList )
+distancer.nearest( (1,1), foodList )
 """
 
-import sys, time, random
+import sys, time, random, os, hashlib
+from array import array
 
 class Distancer:
   def __init__(self, layout, default = 10000):
@@ -41,6 +47,9 @@ class Distancer:
     """
     if self._distances == None:
       return manhattanDistance(pos1, pos2)
+    distance = self._distances.getDistance(pos1, pos2)
+    if distance != None:
+      return distance
     if isInt(pos1) and isInt(pos2):
       return self.getDistanceOnGrid(pos1, pos2)
     pos1Grids = getGrids2D(pos1)
@@ -55,11 +64,57 @@ class Distancer:
     return bestDistance
 
   def getDistanceOnGrid(self, pos1, pos2):
-    key = (pos1, pos2)
-    if key in self._distances:
-      return self._distances[key]
-    else:
-      raise Exception("Positions not in grid: " + str(key))
+    distance = self._distances.getDistance(pos1, pos2)
+    if distance == None:
+      raise Exception("Positions not in grid: " + str((pos1, pos2)))
+    return distance
+
+  def row(self, pos):
+    """
+    Returns the distances from the open cell pos to every open cell, as a
+    read-only sequence indexed by cell number (see cellIndex).  Unreachable
+    cells read as UNREACHABLE.
+    """
+    table = self._distances
+    i = table.index.get(pos)
+    if i == None:
+      raise Exception("Position not in grid: " + str(pos))
+    return memoryview(table.distances)[i * table.numCells:(i + 1) * table.numCells]
+
+  def cellIndex(self, pos):
+    "The number of the open cell pos in the rows returned by row()"
+    return self._distances.index[pos]
+
+  def getDistances(self, pos, targets):
+    """
+    Returns the list of distances from pos to each of targets, reading
+    them all from a single row of the table when it can.
+    """
+    table = self._distances
+    if table == None or pos not in table.index:
+      return [self.getDistance(pos, target) for target in targets]
+    row = self.row(pos)
+    index = table.index
+    distances = []
+    for target in targets:
+      i = index.get(target)
+      if i == None or row[i] == UNREACHABLE:
+        distances.append(self.getDistance(pos, target))
+      else:
+        distances.append(row[i])
+    return distances
+
+  def nearest(self, pos, targets):
+    """
+    Returns (distance, target) for the target closest to pos, or None
+    if there are no targets.  Ties go to the earliest target.
+    """
+    targets = list(targets)
+    distances = self.getDistances(pos, targets)
+    if len(distances) == 0:
+      return None
+    i = min(range(len(distances)), key=distances.__getitem__)
+    return distances[i], targets[i]
 
   def isReadyForMazeDistance(self):
     return self._distances != None
@@ -88,6 +143,14 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# Table entry for a cell that cannot be reached
+UNREACHABLE = 0xFFFF
+
+# Distance tables are also saved here, one file per set of walls, so that
+# later games and other processes playing the same layout can load them
+# instead of recomputing.  Set to None to keep them in memory only.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.distanceCache')
+
 distanceMap = {}
 
 class DistanceCalculator:
@@ -100,58 +163,108 @@ class DistanceCalculator:
     global distanceMap
 
     if self.layout.walls not in distanceMap:
-      distances = computeDistances(self.layout)
+      distances = loadDistances(self.layout)
       distanceMap[self.layout.walls] = distances
     else:
       distances = distanceMap[self.layout.walls]
 
     self.distancer._distances = distances
 
+class DistanceTable:
+  """
+  The maze distances between every pair of open cells.  Cells are
+  numbered in walls.asList(False) order, and the distance from cell i
+  to cell j is distances[i * numCells + j] in a flat array of unsigned
+  16-bit entries.
+  """
+  def __init__(self, cells, distances):
+    self.cells = cells
+    self.index = dict((cell, i) for i, cell in enumerate(cells))
+    self.numCells = len(cells)
+    self.distances = distances
+
+  def getDistance(self, pos1, pos2):
+    """
+    Returns the maze distance between two open cells, or None if either
+    position is not an open cell.
+    """
+    i = self.index.get(pos1)
+    j = self.index.get(pos2)
+    if i == None or j == None:
+      return None
+    distance = self.distances[i * self.numCells + j]
+    if distance == UNREACHABLE:
+      return sys.maxsize
+    return distance
+
 def computeDistances(layout):
-    "Runs UCS to all other positions from each position"
-    distances = {}
-    allNodes = layout.walls.asList(False)
-    for source in allNodes:
-        dist = {}
-        closed = {}
-        for node in allNodes:
-            dist[node] = sys.maxsize
-        import util
-        queue = util.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
-            if not layout.isWall((x,y+1)):
-                adjacent.append((x,y+1))
-            if not layout.isWall((x,y-1)):
-                adjacent.append((x,y-1) )
-            if not layout.isWall((x+1,y)):
-                adjacent.append((x+1,y) )
-            if not layout.isWall((x-1,y)):
-                adjacent.append((x-1,y))
-            for other in adjacent:
-                if not other in dist:
-                    continue
-                oldDist = dist[other]
-                newDist = nodeDist+1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
-    return distances
+    "Runs BFS to all other positions from each position"
+    cells = layout.walls.asList(False)
+    index = dict((cell, i) for i, cell in enumerate(cells))
+    neighbors = []
+    for x, y in cells:
+        adjacent = [(x,y+1), (x,y-1), (x+1,y), (x-1,y)]
+        neighbors.append([index[other] for other in adjacent if other in index])
+
+    numCells = len(cells)
+    distances = array('H', [UNREACHABLE]) * (numCells * numCells)
+    for source in range(numCells):
+        row = source * numCells
+        distances[row + source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for node in frontier:
+                for other in neighbors[node]:
+                    if distances[row + other] == UNREACHABLE:
+                        distances[row + other] = depth
+                        nextFrontier.append(other)
+            frontier = nextFrontier
+    return DistanceTable(cells, distances)
+
+def loadDistances(layout):
+    """
+    Returns the DistanceTable for layout, read from CACHE_DIR if an
+    earlier run saved one for the same walls, and computed (and saved)
+    otherwise.
+    """
+    if CACHE_DIR == None:
+      return computeDistances(layout)
+
+    cells = layout.walls.asList(False)
+    path = os.path.join(CACHE_DIR, wallsDigest(layout.walls) + '.dist')
+    distances = array('H')
+    try:
+      with open(path, 'rb') as f:
+        distances.fromfile(f, len(cells) * len(cells))
+      return DistanceTable(cells, distances)
+    except (OSError, EOFError):
+      pass
+
+    table = computeDistances(layout)
+    try:
+      # Write to a private file first so concurrent games never read a
+      # partial table
+      if not os.path.isdir(CACHE_DIR):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+      tmpPath = '%s.%d.tmp' % (path, os.getpid())
+      with open(tmpPath, 'wb') as f:
+        table.distances.tofile(f)
+      os.replace(tmpPath, path)
+    except OSError:
+      pass
+    return table
+
+def wallsDigest(walls):
+    "A hex digest identifying a set of walls"
+    text = '%d %d\n%s' % (walls.width, walls.height, str(walls))
+    return hashlib.sha1(text.encode()).hexdigest()
 
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-      return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if distance != None:
+      return distance
     return 100000
-
@@ -21,7 +21,8 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
-import time, os
+import contextlib
+import time, os, random
 import traceback
 import sys
 
@@ -368,6 +369,19 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
+# Zobrist keys for the board: one random 64 bit key per food cell and per
+# capsule position, drawn lazily from a private generator so that hashing
+# never disturbs the seeded game randomness.
+_zobristRandom = random.Random(188)
+ZOBRIST_FOOD = {}
+ZOBRIST_CAPSULES = {}
+
+def zobristKey(table, position):
+    key = table.get(position)
+    if key == None:
+        key = table[position] = _zobristRandom.getrandbits(64)
+    return key
+
 class GameStateData:
     """
 
@@ -383,6 +397,11 @@ class GameStateData:
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._copyHashFrom( prevState )
+        else:
+            self._boardHash = 0
+            self._hashedFood = None
+            self._agentHashes = None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -392,14 +411,33 @@ class GameStateData:
         self._win = False
         self.scoreChange = 0
 
+    def view( self ):
+        """
+        Returns a view of this data for an agent.  Its food grid, capsule list
+        and agent states are copies, so nothing written to the view reaches
+        this data.
+        """
+        state = GameStateData( self )
+        state.food = self.food.copy()
+        if self._hashedFood is self.food: state._hashedFood = state.food
+        state._agentMoved = self._agentMoved
+        state._foodEaten = self._foodEaten
+        state._foodAdded = self._foodAdded
+        state._capsuleEaten = self._capsuleEaten
+        state._lose = self._lose
+        state._win = self._win
+        state.scoreChange = self.scoreChange
+        return state
+
     def deepCopy( self ):
         state = GameStateData( self )
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        state.layout = self.layout # Layouts are immutable
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
         state._capsuleEaten = self._capsuleEaten
+        state._copyHashFrom( self )
         return state
 
     def copyAgentStates( self, agentStates ):
@@ -408,12 +446,64 @@ class GameStateData:
             copiedStates.append( agentState.copy() )
         return copiedStates
 
+    def _copyHashFrom( self, other ):
+        """
+        Carries the incremental hash over from a state with the same contents.
+        """
+        self._boardHash = other._boardHash
+        if other._hashedFood is other.food: self._hashedFood = self.food
+        else: self._hashedFood = None
+        if other._agentHashes == None: self._agentHashes = None
+        else: self._agentHashes = other._agentHashes[:]
+
+    def _rehashBoard( self ):
+        food = self.food
+        if type(food) == type((1,2)):
+            food = reconstituteGrid(food)
+        h = 0
+        for position in food.asList():
+            h ^= zobristKey(ZOBRIST_FOOD, position)
+        for position in self.capsules:
+            h ^= zobristKey(ZOBRIST_CAPSULES, position)
+        self._boardHash = h
+        self._hashedFood = self.food
+
+    def _agentHash( self, index ):
+        agentState = self.agentStates[index]
+        conf = agentState.configuration
+        if conf == None: return hash((index, None, None, agentState.scaredTimer))
+        return hash((index, conf.pos, conf.direction, agentState.scaredTimer))
+
+    def updateFoodHash( self, position ):
+        """
+        Folds a change of the food at position into the hash.  Call it right
+        after flipping that cell (and after replacing self.food by a copy).
+        """
+        if self._hashedFood != None:
+            self._boardHash ^= zobristKey(ZOBRIST_FOOD, position)
+            self._hashedFood = self.food
+
+    def updateCapsuleHash( self, position ):
+        """
+        Folds the removal (or addition) of the capsule at position into the hash.
+        """
+        self._boardHash ^= zobristKey(ZOBRIST_CAPSULES, position)
+
+    def updateAgentHash( self, index ):
+        """
+        Refreshes the hash of one agent after its configuration or scared
+        timer changed.
+        """
+        if self._agentHashes != None:
+            self._agentHashes[index] = self._agentHash(index)
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
         """
         if other == None: return False
         # TODO Check for type of other
+        if hash(self) != hash(other): return False
         if not self.agentStates == other.agentStates: return False
         if not self.food == other.food: return False
         if not self.capsules == other.capsules: return False
@@ -423,14 +513,18 @@ class GameStateData:
     def __hash__( self ):
         """
         Allows states to be keys of dictionaries.
+
+        The food and capsule part is a Zobrist hash kept up to date by the
+        game rules, so hashing does not walk the board.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        if self._hashedFood is not self.food:
+            self._rehashBoard()
+        if self._agentHashes == None or len(self._agentHashes) != len(self.agentStates):
+            self._agentHashes = [self._agentHash(i) for i in range(len(self.agentStates))]
+        h = self._boardHash
+        for agentHash in self._agentHashes:
+            h ^= agentHash
+        return hash((h, self.score))
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
@@ -503,6 +597,8 @@ class GameStateData:
                 else: numGhosts += 1
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
         self._eaten = [False for a in self.agentStates]
+        self._rehashBoard()
+        self._agentHashes = None
 
 try:
     import boinc
@@ -515,7 +611,7 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False ):
+    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, copyObservations=False, turbo=False, profile=None ):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -524,6 +620,9 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.copyObservations = copyObservations
+        self.turbo = turbo
+        self.profile = profile
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -544,6 +643,14 @@ class Game:
         self.agentCrashed = True
         self.rules.agentCrash(self, agentIndex)
 
+    def _observation( self ):
+        """
+        Returns what an agent is shown of the current state: a read-only view
+        of it, or a full copy if the game was made with copyObservations.
+        """
+        if self.copyObservations: return self.state.deepCopy()
+        return self.state.view()
+
     OLD_STDOUT = None
     OLD_STDERR = None
 
@@ -566,47 +673,21 @@ class Game:
 
     def run( self ):
         """
-        Main control loop for game play.
+        Main control loop for game play.  All of the game's time limits are
+        enforced through one TimeoutGuard.  A GameProfile given to the game
+        records it while it runs.
         """
+        recording = contextlib.nullcontext()
+        if self.profile != None: recording = self.profile.recording(self)
+        with TimeoutGuard() as self.timeoutGuard, recording:
+            if self.turbo: self._runTurbo()
+            else: self._runGame()
+
+    def _runGame( self ):
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
-        ###self.display.initialize(self.state.makeObservation(1).data)
-        # inform learning agents of the game start
-        for i in range(len(self.agents)):
-            agent = self.agents[i]
-            if not agent:
-                self.mute(i)
-                # this is a null agent, meaning it failed to load
-                # the other team wins
-                print("Agent %d failed to load" % i, file=sys.stderr)
-                self.unmute()
-                self._agentCrash(i, quiet=True)
-                return
-            if ("registerInitialState" in dir(agent)):
-                self.mute(i)
-                if self.catchExceptions:
-                    try:
-                        timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
-                        try:
-                            start_time = time.time()
-                            timed_func(self.state.deepCopy())
-                            time_taken = time.time() - start_time
-                            self.totalAgentTimes[i] += time_taken
-                        except TimeoutFunctionException:
-                            print("Agent %d ran out of time on startup!" % i, file=sys.stderr)
-                            self.unmute()
-                            self.agentTimeout = True
-                            self._agentCrash(i, quiet=True)
-                            return
-                    except Exception as data:
-                        self._agentCrash(i, quiet=False)
-                        self.unmute()
-                        return
-                else:
-                    agent.registerInitialState(self.state.deepCopy())
-                ## TODO: could this exceed the total time
-                self.unmute()
+        if not self._registerAgents(): return
 
         agentIndex = self.startingIndex
         numAgents = len( self.agents )
@@ -621,35 +702,33 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
                         try:
-                            start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            start_time = time.perf_counter()
+                            observation = self.timeoutGuard.call(self.rules.getMoveTimeout(agentIndex), agent.observationFunction, self._observation())
                         except TimeoutFunctionException:
                             skip_action = True
-                        move_time += time.time() - start_time
+                        move_time += time.perf_counter() - start_time
                         self.unmute()
                     except Exception as data:
                         self._agentCrash(agentIndex, quiet=False)
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self._observation())
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observation()
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(self.rules.getMoveTimeout(agentIndex)) - int(move_time))
                     try:
-                        start_time = time.time()
+                        start_time = time.perf_counter()
                         if skip_action:
                             raise TimeoutFunctionException()
-                        action = timed_func( observation )
+                        action = self.timeoutGuard.call( self.rules.getMoveTimeout(agentIndex) - move_time, agent.getAction, observation )
                     except TimeoutFunctionException:
                         print("Agent %d timed out on a single move!" % agentIndex, file=sys.stderr)
                         self.agentTimeout = True
@@ -657,7 +736,7 @@ class Game:
                         self.unmute()
                         return
 
-                    move_time += time.time() - start_time
+                    move_time += time.perf_counter() - start_time
 
                     if move_time > self.rules.getMoveWarningTime(agentIndex):
                         self.totalAgentTimeWarnings[agentIndex] += 1
@@ -714,6 +793,132 @@ class Game:
             if _BOINC_ENABLED:
                 boinc.set_fraction_done(self.getProgress())
 
+        self._finishGame()
+
+    def _runTurbo( self ):
+        """
+        Headless main loop for training runs and tournaments.  Agent methods
+        are looked up once, the display only sees the first and last states,
+        and each move's observation and action are timed together as a single
+        call.  As in run, an agent's output goes to its buffer only while it
+        moves, so timeout and crash reports still reach the console.
+        """
+        self.display.initialize(self.state.data)
+        self.numMoves = 0
+
+        if not self._registerAgents(): return
+
+        observers = [getattr(agent, 'observationFunction', None) for agent in self.agents]
+        actors = [agent.getAction for agent in self.agents]
+        agentIndex = self.startingIndex
+        numAgents = len( self.agents )
+
+        try:
+            while not self.gameOver:
+                if self.catchExceptions:
+                    try:
+                        start_time = time.perf_counter()
+                        action = self.timeoutGuard.call( self.rules.getMoveTimeout(agentIndex), self._turboMove, agentIndex, observers[agentIndex], actors[agentIndex] )
+                        move_time = time.perf_counter() - start_time
+                    except TimeoutFunctionException:
+                        print("Agent %d timed out on a single move!" % agentIndex, file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+                    except Exception as data:
+                        self._agentCrash(agentIndex)
+                        return
+
+                    if move_time > self.rules.getMoveWarningTime(agentIndex):
+                        self.totalAgentTimeWarnings[agentIndex] += 1
+                        print("Agent %d took too long to make a move! This is warning %d" % (agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                        if self.totalAgentTimeWarnings[agentIndex] > self.rules.getMaxTimeWarnings(agentIndex):
+                            print("Agent %d exceeded the maximum number of warnings: %d" % (agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                            self.agentTimeout = True
+                            self._agentCrash(agentIndex, quiet=True)
+                            return
+
+                    self.totalAgentTimes[agentIndex] += move_time
+                    if self.totalAgentTimes[agentIndex] > self.rules.getMaxTotalTime(agentIndex):
+                        print("Agent %d ran out of time! (time: %1.2f)" % (agentIndex, self.totalAgentTimes[agentIndex]), file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+
+                    self.moveHistory.append( (agentIndex, action) )
+                    try:
+                        self.state = self.state.generateSuccessor( agentIndex, action )
+                    except Exception as data:
+                        self._agentCrash(agentIndex)
+                        return
+                else:
+                    action = self._turboMove( agentIndex, observers[agentIndex], actors[agentIndex] )
+                    self.moveHistory.append( (agentIndex, action) )
+                    self.state = self.state.generateSuccessor( agentIndex, action )
+
+                self.rules.process(self.state, self)
+                agentIndex = ( agentIndex + 1 ) % numAgents
+        finally:
+            # A timeout can interrupt _turboMove before it unmutes
+            self.unmute()
+
+        self.display.update( self.state.data )
+        self._finishGame()
+
+    def _turboMove( self, agentIndex, observe, act ):
+        self.mute(agentIndex)
+        try:
+            if observe == None: return act(self._observation())
+            return act(observe(self._observation()))
+        finally:
+            self.unmute()
+
+    def _registerAgents( self ):
+        """
+        Hands every agent the initial state.  Returns False if one of them
+        failed, which ends the game.
+        """
+        ###self.display.initialize(self.state.makeObservation(1).data)
+        # inform learning agents of the game start
+        for i in range(len(self.agents)):
+            agent = self.agents[i]
+            if not agent:
+                self.mute(i)
+                # this is a null agent, meaning it failed to load
+                # the other team wins
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self.unmute()
+                self._agentCrash(i, quiet=True)
+                return False
+            if ("registerInitialState" in dir(agent)):
+                self.mute(i)
+                if self.catchExceptions:
+                    try:
+                        try:
+                            start_time = time.perf_counter()
+                            self.timeoutGuard.call(self.rules.getMaxStartupTime(i), agent.registerInitialState, self.state.deepCopy())
+                            time_taken = time.perf_counter() - start_time
+                            self.totalAgentTimes[i] += time_taken
+                        except TimeoutFunctionException:
+                            print("Agent %d ran out of time on startup!" % i, file=sys.stderr)
+                            self.unmute()
+                            self.agentTimeout = True
+                            self._agentCrash(i, quiet=True)
+                            return False
+                    except Exception as data:
+                        self._agentCrash(i, quiet=False)
+                        self.unmute()
+                        return False
+                else:
+                    agent.registerInitialState(self.state.deepCopy())
+                ## TODO: could this exceed the total time
+                self.unmute()
+        return True
+
+    def _finishGame( self ):
+        """
+        Informs learning agents of the game result and closes the display.
+        """
         # inform a learning agent of the game result
         for agentIndex, agent in enumerate(self.agents):
             if "final" in dir( agent ) :
@@ -727,3 +932,175 @@ class Game:
                     self.unmute()
                     return
         self.display.finish()
+
+
+class GameProfile:
+    """
+    Records where the time of one game goes, for a Game made with it.
+
+    Each agent's registerInitialState, observationFunction and getAction
+    calls are timed, along with every generateSuccessor and doMove call and
+    the game rules' process call made during that agent's turn.  The display
+    has its own timings.  generateSuccessor, doMove, deepCopy and view calls
+    on the game's state class are counted wherever they come from, including
+    the agents' own searches, which step with doMove and undoMove where the
+    state class has them.  Because successor time is recorded inside
+    getAction as well, the phases overlap.  The methods are swapped for
+    timed ones while the game runs, so profile one game at a time in a
+    process.  With a statsFile, cProfile also runs for the whole game and
+    its stats are dumped there for pstats.
+    """
+    AGENT_PHASES = ['registerInitialState', 'observationFunction',
+                    'getAction', 'generateSuccessor', 'doMove', 'process']
+    COUNTED = ['generateSuccessor', 'doMove', 'deepCopy', 'view']
+
+    def __init__(self, statsFile=None):
+        self.statsFile = statsFile
+        self.agentIndex = 0
+        self.agentPhases = []
+        self.display = [0, 0.0, 0.0]
+        self.counts = dict((name, 0) for name in self.COUNTED)
+        self.seconds = 0.0
+        self.moves = 0
+
+    @contextlib.contextmanager
+    def recording(self, game):
+        """
+        Profiles game while the body of the with statement runs.
+        """
+        self.agentPhases = [dict((phase, [0, 0.0, 0.0]) for phase in self.AGENT_PHASES)
+                            for agent in game.agents]
+        patches = []
+        for index, agent in enumerate(game.agents):
+            if not agent:
+                continue
+            for phase in ['registerInitialState', 'observationFunction', 'getAction']:
+                if hasattr(agent, phase):
+                    patches.append(self._patch(agent, phase,
+                                               self._agentTimer(index, phase, getattr(agent, phase))))
+        patches.append(self._patch(game.rules, 'process',
+                                   self._turnTimer('process', game.rules.process)))
+        for name in ['initialize', 'update', 'finish']:
+            if hasattr(game.display, name):
+                patches.append(self._patch(game.display, name,
+                                           self._displayTimer(getattr(game.display, name))))
+        stateClass = type(game.state)
+        for name in self.COUNTED:
+            if name in stateClass.__dict__:
+                patches.append(self._patch(stateClass, name,
+                                           self._counter(name, stateClass.__dict__[name])))
+
+        profiler = None
+        if self.statsFile != None:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            if profiler != None:
+                profiler.disable()
+                profiler.dump_stats(self.statsFile)
+            for target, name, hadOwn, old in reversed(patches):
+                if hadOwn:
+                    setattr(target, name, old)
+                else:
+                    delattr(target, name)
+            self.moves += len(game.moveHistory)
+
+    def _patch(self, target, name, replacement):
+        hadOwn = name in target.__dict__
+        old = target.__dict__.get(name)
+        setattr(target, name, replacement)
+        return (target, name, hadOwn, old)
+
+    def _record(self, times, seconds):
+        times[0] += 1
+        times[1] += seconds
+        if seconds > times[2]:
+            times[2] = seconds
+
+    def _agentTimer(self, index, phase, function):
+        def timed(*args, **keyArgs):
+            self.agentIndex = index
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.agentPhases[index][phase],
+                             time.perf_counter() - start)
+        return timed
+
+    def _turnTimer(self, phase, function):
+        def timed(*args, **keyArgs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.agentPhases[self.agentIndex][phase],
+                             time.perf_counter() - start)
+        return timed
+
+    def _displayTimer(self, function):
+        def timed(*args, **keyArgs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **keyArgs)
+            finally:
+                self._record(self.display, time.perf_counter() - start)
+        return timed
+
+    def _counter(self, name, function):
+        if name in ['generateSuccessor', 'doMove']:
+            function = self._turnTimer(name, function)
+
+        def counted(*args, **keyArgs):
+            self.counts[name] += 1
+            return function(*args, **keyArgs)
+        return counted
+
+    def summary(self):
+        """
+        Returns the recorded times and counts as a dictionary of plain values
+        that json can write.  Each timing is {'calls', 'seconds', 'max'}.
+        """
+        def timing(times):
+            return {'calls': times[0], 'seconds': round(times[1], 6), 'max': round(times[2], 6)}
+        summary = {'seconds': round(self.seconds, 6), 'moves': self.moves,
+                   'counts': dict(self.counts),
+                   'display': timing(self.display),
+                   'agents': [dict((phase, timing(phases[phase])) for phase in self.AGENT_PHASES)
+                              for phases in self.agentPhases]}
+        if self.statsFile != None:
+            summary['statsFile'] = self.statsFile
+        return summary
+
+    @staticmethod
+    def combine(summaries):
+        """
+        Adds up game summaries (of games with the same number of agents) into
+        one for the whole run.
+        """
+        def add(total, timing):
+            total['calls'] += timing['calls']
+            total['seconds'] = round(total['seconds'] + timing['seconds'], 6)
+            total['max'] = max(total['max'], timing['max'])
+        total = {'games': 0, 'seconds': 0.0, 'moves': 0,
+                 'counts': dict((name, 0) for name in GameProfile.COUNTED),
+                 'display': {'calls': 0, 'seconds': 0.0, 'max': 0.0}, 'agents': []}
+        for summary in summaries:
+            total['games'] += 1
+            total['seconds'] = round(total['seconds'] + summary['seconds'], 6)
+            total['moves'] += summary['moves']
+            for name in GameProfile.COUNTED:
+                total['counts'][name] += summary['counts'][name]
+            add(total['display'], summary['display'])
+            for index, phases in enumerate(summary['agents']):
+                if index == len(total['agents']):
+                    total['agents'].append(dict((phase, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+                                                for phase in GameProfile.AGENT_PHASES))
+                for phase in GameProfile.AGENT_PHASES:
+                    add(total['agents'][index][phase], phases[phase])
+        return total
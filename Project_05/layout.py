@@ -16,13 +16,25 @@ from util import manhattanDistance
 from game import Grid
 import os
 import random
+import pickle
+import collections
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# getLayout keeps the most recently loaded layouts here, by directory and name
+LAYOUT_CACHE = collections.OrderedDict()
+LAYOUT_CACHE_SIZE = 32
+
+# Layouts read from a layout store (see loadLayoutStore), by name
+LAYOUT_STORE = {}
+
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    Layouts are immutable once built, so one layout is shared by reference
+    between games and states (deepCopy returns the layout itself).
     """
 
     def __init__(self, layoutText):
@@ -37,6 +49,13 @@ class Layout:
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
         # self.initializeVisibilityMatrix()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        # The visibility matrix is the only thing filled in later
+        if self.__dict__.get('_frozen') and name != 'visibility':
+            raise AttributeError('Layouts are shared and cannot be changed')
+        self.__dict__[name] = value
 
     def getNumGhosts(self):
         return self.numGhosts
@@ -91,7 +110,7 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -130,17 +149,33 @@ class Layout:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
 def getLayout(name, back = 2):
+    """
+    Loads the layout called name from layouts/ or the current directory,
+    or from up to back + 1 levels above it.  Layouts from a loaded layout
+    store come first, and recently loaded ones are cached.
+    """
+    if name in LAYOUT_STORE:
+        return LAYOUT_STORE[name]
+    key = (os.path.abspath('.'), name, back)
+    if key in LAYOUT_CACHE:
+        LAYOUT_CACHE.move_to_end(key)
+        return LAYOUT_CACHE[key]
+
     if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None: layout = tryToLoad(name)
+        fileNames = ['layouts/' + name, name]
     else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None: layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back -1)
-        os.chdir(curdir)
+        fileNames = ['layouts/' + name + '.lay', name + '.lay']
+    layout = None
+    for level in range(back + 2):
+        for fileName in fileNames:
+            layout = tryToLoad(os.path.join(*(['..'] * level + [fileName])))
+            if layout != None: break
+        if layout != None: break
+
+    if layout != None:
+        LAYOUT_CACHE[key] = layout
+        if len(LAYOUT_CACHE) > LAYOUT_CACHE_SIZE:
+            LAYOUT_CACHE.popitem(last=False)
     return layout
 
 def tryToLoad(fullname):
@@ -148,3 +183,36 @@ def tryToLoad(fullname):
     f = open(fullname)
     try: return Layout([line.strip() for line in f])
     finally: f.close()
+
+def writeLayoutStore(fileName, names):
+    """
+    Saves the named layouts, fully built, to a layout store file.
+    """
+    layouts = {}
+    for name in names:
+        layout = getLayout(name)
+        if layout == None:
+            raise Exception("The layout " + name + " cannot be found")
+        layouts[name] = layout
+    f = open(fileName, 'wb')
+    try: pickle.dump(layouts, f, pickle.HIGHEST_PROTOCOL)
+    finally: f.close()
+
+def loadLayoutStore(fileName):
+    """
+    Reads a layout store written by writeLayoutStore; getLayout then
+    returns its layouts without reading or parsing any layout files.
+    """
+    f = open(fileName, 'rb')
+    try: LAYOUT_STORE.update(pickle.load(f))
+    finally: f.close()
+
+if __name__ == '__main__':
+    # python layout.py STORE [LAYOUT ...] packs the given layouts, or all
+    # of those in layouts/, into the layout store STORE
+    import sys
+    names = sys.argv[2:]
+    if len(names) == 0:
+        names = sorted([name[:-4] for name in os.listdir('layouts') if name.endswith('.lay')])
+    writeLayoutStore(sys.argv[1], names)
+    print('Stored %d layouts in %s' % (len(names), sys.argv[1]))
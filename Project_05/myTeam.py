@@ -248,7 +248,7 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
         opps = [successor.getAgentState(i) for i in self.getOpponents(successor)]
         oppGhosts = [opp for opp in opps if not opp.isPacman and opp.getPosition() is not None]
         oppGhostPositions = [ghost.getPosition() for ghost in oppGhosts]
-        distsToGhosts = [self.getMazeDistance(newPosition, ghostPos) for ghostPos in oppGhostPositions]
+        distsToGhosts = self.distancer.getDistances(newPosition, oppGhostPositions)
 
         if len(oppGhosts) > 0:
             ghostScaredTimer = max([ghost.scaredTimer for ghost in oppGhosts])
@@ -257,7 +257,7 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
 
         # Feature 1: Distance To The Nearest Food
         if len(foodList) > 0:  # This should always be True,  but better safe than sorry
-            minFoodDistance = min([self.getMazeDistance(newPosition, food) for food in foodList])
+            minFoodDistance, _ = self.distancer.nearest(newPosition, foodList)
             features['disToFood'] = minFoodDistance
             if ghostScaredTimer > 4:
                 return util.Counter({
@@ -269,7 +269,7 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
         # Feature 3: Distance To The Nearest Capsule
         capsulePositions = self.getCapsules(successor)
         if len(capsulePositions) > 0:  # I guess we'll double-check everything now
-            minCapDistance = min([self.getMazeDistance(newPosition, capsule) for capsule in capsulePositions])
+            minCapDistance, _ = self.distancer.nearest(newPosition, capsulePositions)
             features['disToCap'] = minCapDistance
 
         # Feature 4: Distance To The Nearest Ghost
@@ -396,8 +396,7 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
 
         # Feature 3
         if len(invaders) > 0:
-            dists = [self.getMazeDistance(newPosition, a.getPosition()) for a in invaders]
-            features['invaderDistance'] = min(dists)
+            features['invaderDistance'], _ = self.distancer.nearest(newPosition, [a.getPosition() for a in invaders])
 
         # Feature 4
         if action == Directions.STOP: features['stop'] = 1
@@ -444,11 +443,7 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
 
         if not invaders or not capsules:
             return 0
-        sd = sys.maxsize
-        for i in invaders:
-            for c in capsules:
-                sd = min(sd, self.getMazeDistance(i.getPosition(), c))
-        return sd
+        return min([self.distancer.nearest(i.getPosition(), capsules)[0] for i in invaders])
 
     def getReward(self, gameState: capture.GameState, action, nextState: capture.GameState):
         reward = 0
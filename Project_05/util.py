@@ -15,6 +15,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 import io
 
 
@@ -137,18 +138,18 @@ class Stack:
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.append(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
@@ -580,46 +581,170 @@ def pause():
 
 # code to handle timeouts
 #
-# FIXME
-# NOTE: TimeoutFuncton is NOT reentrant.  Later timeouts will silently
-# disable earlier timeouts.  Could be solved by maintaining a global list
-# of active time outs.  Currently, questions which have test cases calling
-# this have all student code so wrapped.
+# A game opens one TimeoutGuard and runs every timed call into agent code
+# through it.  On the main thread the guard owns the process interval timer
+# (SIGALRM via setitimer), so deadlines can be fractions of a second; a
+# deadline that was already armed when the guard opened (say, the
+# autograder's limit on a whole question) is kept and still fires.  Signals
+# only reach the main thread, so on any other thread a watchdog thread raises
+# the timeout in the guarded thread instead.  Either way a call that returns
+# after its deadline raises too, which covers code neither could interrupt.
 #
 import signal
+import threading
 import time
+try:
+    import ctypes
+    _raiseInThread = ctypes.pythonapi.PyThreadState_SetAsyncExc
+except (ImportError, AttributeError):
+    _raiseInThread = None
+
+
 class TimeoutFunctionException(Exception):
     """Exception to raise on a timeout"""
     pass
 
 
+class TimeoutGuard:
+    """
+    Enforces deadlines on calls made from the thread that opened it:
+
+      with TimeoutGuard() as guard:
+          action = guard.call(0.5, agent.getAction, state)
+
+    Outside the with block only the check after the call is made.  Times are
+    measured with time.perf_counter.
+    """
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.useSignal = (hasattr(signal, 'setitimer') and
+                          threading.current_thread() is threading.main_thread())
+        self.isOpen = False
+        self.oldHandler = None
+        self.outerDeadline = None
+        self.outerInterval = 0
+        self.condition = threading.Condition()
+        self.deadline = None
+        self.fired = False
+        self.watchdog = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+    def open(self):
+        if self.useSignal:
+            self.oldHandler = signal.signal(signal.SIGALRM, self._handleAlarm)
+            delay, self.outerInterval = signal.getitimer(signal.ITIMER_REAL)
+            if delay > 0:
+                self.outerDeadline = time.perf_counter() + delay
+        self.isOpen = True
+
+    def close(self):
+        if not self.isOpen:
+            return
+        self._disarm()
+        self.isOpen = False
+        if self.useSignal:
+            signal.signal(signal.SIGALRM, self.oldHandler)
+            self.outerDeadline = None
+        elif self.watchdog != None:
+            with self.condition:
+                self.condition.notify()
+            self.watchdog = None
+
+    def call(self, timeout, function, *args, **keyArgs):
+        """
+        Returns function(*args, **keyArgs), raising TimeoutFunctionException
+        if it runs for timeout seconds or more.
+        """
+        if timeout <= 0:
+            raise TimeoutFunctionException()
+        startTime = time.perf_counter()
+        self._arm(startTime + timeout)
+        try:
+            result = function(*args, **keyArgs)
+        finally:
+            self._disarm()
+        if time.perf_counter() - startTime >= timeout:
+            raise TimeoutFunctionException()
+        return result
+
+    def _arm(self, deadline):
+        if not self.isOpen:
+            return
+        if self.useSignal:
+            if self.outerDeadline != None:
+                deadline = min(deadline, self.outerDeadline)
+            signal.setitimer(signal.ITIMER_REAL,
+                             max(deadline - time.perf_counter(), 1e-6))
+        elif _raiseInThread != None:
+            with self.condition:
+                self.deadline = deadline
+                self.fired = False
+                if self.watchdog == None:
+                    self.watchdog = threading.Thread(
+                        target=self._watch, daemon=True)
+                    self.watchdog.start()
+                self.condition.notify()
+
+    def _disarm(self):
+        if not self.isOpen:
+            return
+        if self.useSignal:
+            if self.outerDeadline != None:
+                signal.setitimer(signal.ITIMER_REAL,
+                                 max(self.outerDeadline - time.perf_counter(), 1e-6),
+                                 self.outerInterval)
+            else:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        elif self.watchdog != None:
+            with self.condition:
+                self.deadline = None
+                if self.fired:
+                    # Drop the exception if it has not been delivered yet
+                    _raiseInThread(ctypes.c_ulong(self.thread), None)
+                    self.fired = False
+
+    def _handleAlarm(self, signum, frame):
+        if self.outerDeadline != None and time.perf_counter() >= self.outerDeadline:
+            if callable(self.oldHandler):
+                self.oldHandler(signum, frame)
+        raise TimeoutFunctionException()
+
+    def _watch(self):
+        with self.condition:
+            while self.isOpen:
+                if self.deadline == None:
+                    self.condition.wait()
+                    continue
+                remaining = self.deadline - time.perf_counter()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                _raiseInThread(ctypes.c_ulong(self.thread),
+                               ctypes.py_object(TimeoutFunctionException))
+                self.fired = True
+                self.deadline = None
+
+
 class TimeoutFunction:
+    """
+    Wraps a single function in its own TimeoutGuard.  Code making many timed
+    calls, like a game, should share one guard instead.
+    """
+
     def __init__(self, function, timeout):
         self.timeout = timeout
         self.function = function
 
-    def handle_timeout(self, signum, frame):
-        raise TimeoutFunctionException()
-
     def __call__(self, *args, **keyArgs):
-        # If we have SIGALRM signal, use it to cause an exception if and
-        # when this function runs too long.  Otherwise check the time taken
-        # after the method has returned, and throw an exception then.
-        if hasattr(signal, 'SIGALRM'):
-            old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
-            try:
-                result = self.function(*args, **keyArgs)
-            finally:
-                signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            startTime = time.time()
-            result = self.function(*args, **keyArgs)
-            timeElapsed = time.time() - startTime
-            if timeElapsed >= self.timeout:
-                self.handle_timeout(None, None)
-        return result
+        with TimeoutGuard() as guard:
+            return guard.call(self.timeout, self.function, *args, **keyArgs)
 
 
 
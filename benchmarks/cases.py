@@ -0,0 +1,275 @@
+"""
+The benchmark cases.  Each case runs in its own process with the working
+directory and import path set to its project, so the case functions import
+that project's modules.  A case function sets everything up, seeds random,
+and returns (op, opsPerCall): op is the callable that is timed and
+opsPerCall the number of operations one call of it performs.
+"""
+import random
+
+# name -> (project directory, case function, what one operation is)
+CASES = {}
+
+
+def case(name, project, unit):
+    def register(function):
+        CASES[name] = (project, function, unit)
+        return function
+    return register
+
+
+# Grids and game states
+
+def foodGrid():
+    import layout
+    return layout.getLayout('mediumClassic').food
+
+
+@case('grid.copy', 'Project_02', 'copy')
+def gridCopy():
+    grid = foodGrid()
+    return grid.copy, 1
+
+
+@case('grid.hash', 'Project_02', 'hash')
+def gridHash():
+    grid = foodGrid()
+    return lambda: hash(grid), 1
+
+
+@case('grid.asList', 'Project_02', 'asList')
+def gridAsList():
+    grid = foodGrid()
+    return grid.asList, 1
+
+
+def stateFoodGrid():
+    "The food as game states hold it: a BitGrid rather than the layout's Grid"
+    return foodGrid().toBitGrid()
+
+
+@case('bitGrid.copy', 'Project_02', 'copy')
+def bitGridCopy():
+    grid = stateFoodGrid()
+    return grid.copy, 1
+
+
+@case('bitGrid.hash', 'Project_02', 'hash')
+def bitGridHash():
+    grid = stateFoodGrid()
+    return lambda: hash(grid), 1
+
+
+@case('bitGrid.asList', 'Project_02', 'asList')
+def bitGridAsList():
+    grid = stateFoodGrid()
+    return grid.asList, 1
+
+
+@case('gameState.generateSuccessor', 'Project_02', 'successor')
+def generateSuccessor():
+    import layout
+    from pacman import GameState
+    random.seed(0)
+    state = GameState()
+    state.initialize(layout.getLayout('mediumClassic'), 2)
+    moves = [(agent, action) for agent in range(state.getNumAgents())
+             for action in state.getLegalActions(agent)]
+
+    def op():
+        for agent, action in moves:
+            state.generateSuccessor(agent, action)
+    return op, len(moves)
+
+
+# Search
+
+def searchState(layoutName):
+    import layout
+    import pacman
+    state = pacman.GameState()
+    state.initialize(layout.getLayout(layoutName), 0)
+    return state
+
+
+@case('search.bfs.bigMaze', 'Project_01', 'search')
+def bfsBigMaze():
+    import search
+    import searchAgents
+    state = searchState('bigMaze')
+
+    def op():
+        problem = searchAgents.PositionSearchProblem(state, warn=False, visualize=False)
+        search.breadthFirstSearch(problem)
+    return op, 1
+
+
+@case('search.jps.bigMaze', 'Project_01', 'search')
+def jpsBigMaze():
+    import search
+    import searchAgents
+    state = searchState('bigMaze')
+
+    def op():
+        problem = searchAgents.PositionSearchProblem(state, warn=False, visualize=False)
+        search.jumpPointSearch(problem, searchAgents.manhattanHeuristic)
+    return op, 1
+
+
+@case('search.aStar.bigMaze', 'Project_01', 'search')
+def aStarBigMaze():
+    import search
+    import searchAgents
+    state = searchState('bigMaze')
+
+    def op():
+        problem = searchAgents.PositionSearchProblem(state, warn=False, visualize=False)
+        search.aStarSearch(problem, searchAgents.manhattanHeuristic)
+    return op, 1
+
+
+@case('search.aStar.bigSearch', 'Project_01', 'board')
+def aStarBigSearch():
+    # A* over every food of bigSearch is out of reach, so this eats the board
+    # one closest dot at a time, as ClosestDotSearchAgent does
+    import search
+    import searchAgents
+    start = searchState('bigSearch')
+
+    def op():
+        state = start
+        while state.getNumFood() > 0:
+            for action in search.aStarSearch(searchAgents.AnyFoodSearchProblem(state)):
+                state = state.generateSuccessor(0, action)
+    return op, 1
+
+
+@case('search.aStar.trickySearch', 'Project_01', 'search')
+def aStarTrickySearch():
+    import search
+    import searchAgents
+    state = searchState('trickySearch')
+
+    def op():
+        problem = searchAgents.FoodSearchProblem(state)
+        search.aStarSearch(problem, searchAgents.foodHeuristic)
+    return op, 1
+
+
+@case('search.food.expand.bigSearch', 'Project_01', 'expansion')
+def foodExpandBigSearch(expansions=20000):
+    # Breadth first over FoodSearchProblem states, so this times the goal
+    # test, successor generation and state hashing rather than a heuristic
+    import collections
+    import searchAgents
+    state = searchState('bigSearch')
+
+    def op():
+        problem = searchAgents.FoodSearchProblem(state)
+        start = problem.getStartState()
+        seen = {start}
+        frontier = collections.deque([start])
+        for i in range(expansions):
+            current = frontier.popleft()
+            problem.isGoalState(current)
+            for successor, action, stepCost in problem.getSuccessors(current):
+                if successor not in seen:
+                    seen.add(successor)
+                    frontier.append(successor)
+    return op, expansions
+
+
+# Agents
+
+@case('featureExtractors.closestFood', 'Project_03', 'search')
+def closestFood(size=80):
+    # An open size by size room with one food in the far corner, so the
+    # frontier grows as wide as the room
+    import featureExtractors
+    import game
+    walls = game.Grid(size, size)
+    for i in range(size):
+        walls[i][0] = walls[i][size - 1] = walls[0][i] = walls[size - 1][i] = True
+    food = game.Grid(size, size)
+    food[size - 2][size - 2] = True
+    return lambda: featureExtractors.closestFood((1, 1), food, walls), 1
+
+
+@case('multiAgents.minimax.depth3', 'Project_02', 'getAction')
+def minimaxDepth3():
+    import layout
+    import multiAgents
+    from pacman import GameState
+    random.seed(0)
+    state = GameState()
+    state.initialize(layout.getLayout('mediumClassic'), 2)
+    agent = multiAgents.MinimaxAgent(depth='3')
+    return lambda: agent.getAction(state), 1
+
+
+def largeGridworld(size=40):
+    """
+    A size by size gridworld with scattered walls, a +10 exit in one corner
+    and -10 exits along the middle.
+    """
+    import gridworld
+    rows = []
+    rng = random.Random(size)
+    for y in range(size):
+        row = []
+        for x in range(size):
+            if rng.random() < 0.15:
+                row.append('#')
+            else:
+                row.append(' ')
+        rows.append(row)
+    for x in range(2, size - 2, 6):
+        rows[size // 2][x] = -10
+    rows[0][size - 1] = 10
+    rows[size - 1][0] = 'S'
+    return gridworld.Gridworld(gridworld.makeGrid(rows))
+
+
+@case('valueIteration.large', 'Project_03', 'sweep')
+def valueIterationLarge():
+    import valueIterationAgents
+    mdp = largeGridworld()
+    return lambda: valueIterationAgents.ValueIterationAgent(mdp, 0.9, 20), 20
+
+
+@case('inference.particleFilter', 'Project_04', 'step')
+def particleFilter():
+    import busters
+    import ghostAgents
+    import inference
+    import layout
+    random.seed(0)
+    state = busters.GameState()
+    state.initialize(layout.getLayout('bigHunt'), 1)
+    tracker = inference.ParticleFilter(ghostAgents.RandomGhost(1), 1000)
+    tracker.initialize(state)
+    pacman, ghost = state.getPacmanPosition(), state.getGhostPosition(1)
+    observation = abs(pacman[0] - ghost[0]) + abs(pacman[1] - ghost[1])
+
+    def op():
+        tracker.elapseTime(state)
+        tracker.observeUpdate(observation, state)
+    return op, 1
+
+
+@case('capture.game', 'Project_05', 'move')
+def captureGame(length=300):
+    import capture
+    import textDisplay
+    random.seed(0)
+    layout = capture.loadLayout('defaultCapture')
+    rules = capture.CaptureRules(quiet=True)
+
+    def op():
+        import baselineTeam
+        red = capture.createTeamAgents(baselineTeam, True, {})
+        blue = capture.createTeamAgents(baselineTeam, False, {})
+        agents = sum([list(pair) for pair in zip(red, blue)], [])
+        game = rules.newGame(layout, agents, textDisplay.NullGraphics(), length, True, False, turbo=True)
+        game.run()
+    return op, length
@@ -0,0 +1,169 @@
+"""
+Runs the benchmarks in cases.py and compares them with a stored baseline.
+
+  python benchmarks/run.py                  # run everything, compare with baseline.json
+  python benchmarks/run.py -k grid -k search   # only the cases whose names contain these
+  python benchmarks/run.py --save           # store this run as the new baseline
+
+Every case runs in a fresh process inside its project directory.  Its op is
+called until a sample lasts at least --min-time seconds, and the best of
+--repeat samples gives the operations per second.  One more call under
+tracemalloc gives the peak memory that call allocates, and the process's
+maximum resident set size is reported too.  A case is flagged as a
+regression if it runs more than --tolerance slower than the baseline, or
+allocates more than --tolerance more at its peak.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+
+def measure(name, minTime, repeat):
+    """
+    Runs the case name in this process, which must already be in its
+    project directory, and returns its result.
+    """
+    import random
+    import tracemalloc
+    import cases
+    project, setup, unit = cases.CASES[name]
+    random.seed(0)
+    op, opsPerCall = setup()
+
+    calls = 1
+    best = None
+    for i in range(repeat):
+        while True:
+            start = time.perf_counter()
+            for call in range(calls):
+                op()
+            elapsed = time.perf_counter() - start
+            if elapsed >= minTime:
+                break
+            calls = max(calls * 2, int(calls * minTime / max(elapsed, 1e-9)) + 1)
+        perOp = elapsed / (calls * opsPerCall)
+        if best == None or perOp < best:
+            best = perOp
+
+    tracemalloc.start()
+    op()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {'unit': unit, 'opsPerSec': round(1 / best, 3), 'peakKiB': round(peak / 1024, 1)}
+    try:
+        import resource
+        maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            maxRss //= 1024
+        result['maxRssKiB'] = maxRss
+    except ImportError:
+        pass
+    return result
+
+
+def runCase(name, minTime, repeat):
+    """
+    Runs the case name in a new process in its project directory.
+    """
+    import cases
+    project = cases.CASES[name][0]
+    command = [sys.executable, os.path.abspath(__file__), '--case', name,
+               '--min-time', str(minTime), '--repeat', str(repeat)]
+    output = subprocess.run(command, cwd=os.path.join(ROOT_DIR, project),
+                            stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints results next to baseline and returns the names of the cases that
+    regressed.
+    """
+    regressions = []
+    print('%-30s %14s %9s %12s %9s' % ('case', 'ops/sec', 'vs base', 'peak KiB', 'vs base'))
+    for name, result in results.items():
+        base = baseline.get(name)
+        speed = memory = ''
+        flag = ''
+        if base != None:
+            speedRatio = result['opsPerSec'] / base['opsPerSec']
+            memoryRatio = (result['peakKiB'] + 1) / (base['peakKiB'] + 1)
+            speed = '%+.0f%%' % (100 * (speedRatio - 1))
+            memory = '%+.0f%%' % (100 * (memoryRatio - 1))
+            if speedRatio < 1 - tolerance or memoryRatio > 1 + tolerance:
+                flag = '  REGRESSION'
+                regressions.append(name)
+        print('%-30s %14.1f %9s %12.1f %9s%s' %
+              (name, result['opsPerSec'], speed, result['peakKiB'], memory, flag))
+    return regressions
+
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python benchmarks/run.py <options>')
+    parser.add_option('-k', dest='keywords', action='append', default=[],
+                      help='only run the cases whose names contain this (may be repeated)')
+    parser.add_option('--min-time', dest='minTime', type='float', default=0.2,
+                      help='the shortest time a sample may take, in seconds [Default: %default]')
+    parser.add_option('--repeat', dest='repeat', type='int', default=3,
+                      help='the number of samples to take the best of [Default: %default]')
+    parser.add_option('--baseline', dest='baseline', default=BASELINE_FILE,
+                      help='the baseline JSON file [Default: %default]')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.25,
+                      help='the slowdown or memory growth flagged as a regression [Default: %default]')
+    parser.add_option('--save', dest='save', action='store_true', default=False,
+                      help='write the results to the baseline file instead of comparing')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='also write the results to this JSON file')
+    parser.add_option('--case', dest='case', default=None,
+                      help='run one case in this process (used by the runner)')
+    options, otherjunk = parser.parse_args()
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+
+    if options.case != None:
+        sys.path.insert(0, os.getcwd())
+        sys.path.insert(1, BENCHMARK_DIR)
+        print(json.dumps(measure(options.case, options.minTime, options.repeat)))
+        sys.exit(0)
+
+    sys.path.insert(0, BENCHMARK_DIR)
+    import cases
+    names = [name for name in cases.CASES
+             if not options.keywords or any(k in name for k in options.keywords)]
+    results = {}
+    for name in names:
+        results[name] = runCase(name, options.minTime, options.repeat)
+
+    report = {'python': sys.version.split()[0], 'results': results}
+    if options.output != None:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if options.save:
+        # Cases left out of this run keep their old baseline
+        if os.path.exists(options.baseline):
+            with open(options.baseline) as f:
+                saved = json.load(f)['results']
+            saved.update(results)
+            report['results'] = saved
+        with open(options.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        compare(results, {}, options.tolerance)
+        print('Saved the baseline to %s' % options.baseline)
+        sys.exit(0)
+
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as f:
+            baseline = json.load(f)['results']
+    regressions = compare(results, baseline, options.tolerance)
+    if regressions:
+        print('%d of %d cases regressed' % (len(regressions), len(results)))
+        sys.exit(1)